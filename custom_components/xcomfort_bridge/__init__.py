@@ -1,17 +1,14 @@
 """Support for XComfort Bridge."""
-import asyncio
 import logging
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_IP_ADDRESS,Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.const import CONF_IP_ADDRESS, EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import Event, HomeAssistant
 from homeassistant.helpers.typing import ConfigType
 
-from .const import CONF_AUTH_KEY, CONF_IDENTIFIER, DOMAIN
+from .const import CONF_AUTH_KEY, CONF_IDENTIFIER, CONF_IMPORT_STATISTICS, DOMAIN
 from .hub import XComfortHub
-
-PLATFORMS = [Platform.LIGHT, Platform.CLIMATE, Platform.SENSOR, Platform.COVER]
-
+from .services import async_setup_services
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -19,6 +16,7 @@ _LOGGER = logging.getLogger(__name__)
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     """Boilerplate."""
     hass.data.setdefault(DOMAIN, {})
+    async_setup_services(hass)
     return True
 
 
@@ -33,25 +31,52 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     hub.start()
     hass.data[DOMAIN][entry.entry_id] = hub
 
-    await hub.load_devices()
+    await hub.load_snapshot(entry)
+    if hub.seed_devices():
+        # Entities start from the snapshot, the bridge data arrives in the background.
+        entry.async_create_background_task(
+            hass, hub.verify_devices(entry), "xcomfort_bridge verify devices"
+        )
+    else:
+        await hub.load_devices()
+    hub.register_buttons(entry)
+
+    if entry.options.get(CONF_IMPORT_STATISTICS):
+        if "recorder" in hass.config.components:
+            await hub.start_power_statistics()
+        else:
+            _LOGGER.warning("Statistics import needs the recorder, it is not loaded")
+
+    async def on_stop(event: Event):
+        await hub.save_snapshot()
+        await hub.stop_recording()
+        if hub.power_statistics is not None:
+            hub.power_statistics.async_flush()
+
+    entry.async_on_unload(
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, on_stop)
+    )
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
 
-    await hass.config_entries.async_forward_entry_setups (entry, PLATFORMS)
+    # Kept for unloading, verify_devices may change hub.platforms afterwards.
+    hub.loaded_platforms = hub.platforms
+    await hass.config_entries.async_forward_entry_setups(entry, hub.loaded_platforms)
 
     return True
 
 
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reloads the entry when its options change."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Disconnects from bridge and removes devices loaded."""
     hub = XComfortHub.get_hub(hass, entry)
     await hub.stop()
 
-    unload_ok = all(
-        await asyncio.gather(
-            *[
-                hass.config_entries.async_forward_entry_unload(entry, platform)
-                for platform in PLATFORMS
-            ]
-        )
+    unload_ok = await hass.config_entries.async_unload_platforms(
+        entry, hub.loaded_platforms
     )
     if unload_ok:
         hass.data[DOMAIN].pop(entry.entry_id)
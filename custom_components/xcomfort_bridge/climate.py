@@ -1,26 +1,39 @@
+from __future__ import annotations
+
+import asyncio
 import logging
 
 from xcomfort.connection import Messages
 from xcomfort.bridge import Room, RctMode, RctState
-from homeassistant.components.climate import ClimateEntity
+from homeassistant.components.climate import (
+    ClimateEntity,
+    ClimateEntityFeature,
+    HVACAction,
+    HVACMode,
+)
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import Context, HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.components.climate.const import (
-    CURRENT_HVAC_HEAT,
-    CURRENT_HVAC_IDLE,
-    HVAC_MODE_AUTO,
-    SUPPORT_TARGET_TEMPERATURE,
-    SUPPORT_PRESET_MODE,
     PRESET_ECO,
     PRESET_COMFORT,
 )
-from homeassistant.const import TEMP_CELSIUS
+from homeassistant.const import Platform, UnitOfTemperature
 
+from .commands import command_priority
 from .hub import XComfortHub
 from .const import DOMAIN, VERBOSE
+from .entity import XComfortRoomEntity
+
+SUPPORT_FLAGS = ClimateEntityFeature.TARGET_TEMPERATURE | ClimateEntityFeature.PRESET_MODE
 
-SUPPORT_FLAGS = SUPPORT_TARGET_TEMPERATURE | SUPPORT_PRESET_MODE
+PRESET_COOL = "Cool"
+PRESETS = {
+    RctMode.Cool: PRESET_COOL,
+    RctMode.Eco: PRESET_ECO,
+    RctMode.Comfort: PRESET_COMFORT,
+}
 
 
 _LOGGER = logging.getLogger(__name__)
@@ -37,27 +50,74 @@ async def async_setup_entry(
 
     hub = XComfortHub.get_hub(hass, entry)
 
-    rooms = hub.rooms
-
-    _LOGGER.info(f"Found {len(rooms)} xcomfort rooms")
-
     rcts = list()
-    for room in rooms:
-        if room.state.value is not None:
-            if room.state.value.setpoint is not None:
-                # _LOGGER.info(f"Adding {room}")
-                rct = HASSXComfortRcTouch(hass, hub, room)
-                rcts.append(rct)
+    for room in hub.rooms_for(Platform.CLIMATE):
+        # _LOGGER.info(f"Adding {room}")
+        rct = HASSXComfortRcTouch(hass, hub, room)
+        rcts.append(rct)
 
     _LOGGER.info(f"Added {len(rcts)} rc touch units")
     async_add_entities(rcts)
     return
 
 
-class HASSXComfortRcTouch(ClimateEntity):
-    _attr_temperature_unit = TEMP_CELSIUS
-    _attr_hvac_modes = [HVAC_MODE_AUTO]
+async def async_apply_heating_profile(
+    hub: XComfortHub,
+    profile: dict[HASSXComfortRcTouch, tuple[RctMode | None, float | None]],
+    context: Context | None = None,
+) -> dict[str, dict]:
+    """Sets mode and setpoint of many rooms with one message per room.
+
+    All messages are queued at once, so they go out back to back instead of
+    each waiting for the previous one, and every entity is written once after
+    the whole batch has been sent. Returns the applied mode and setpoint per
+    entity.
+    """
+    allowed = hub.bridge.rctsetpointallowedvalues
+    payloads = {
+        entity: entity.heating_state(mode, setpoint, allowed)
+        for entity, (mode, setpoint) in profile.items()
+    }
+
+    with command_priority(context):
+        results = await asyncio.gather(
+            *[
+                hub.bridge.send_message(Messages.SET_HEATING_STATE, payload)
+                for payload in payloads.values()
+            ],
+            return_exceptions=True,
+        )
+
+    applied = {}
+    failed = []
+    for (entity, payload), result in zip(payloads.items(), results):
+        if isinstance(result, Exception):
+            _LOGGER.warning(f"Setting heating state of {entity.name} failed: {repr(result)}")
+            failed.append(entity.name)
+            continue
+        entity.applied_heating_state(RctMode(payload["mode"]), payload["setpoint"])
+        applied[entity.entity_id] = {
+            "mode": PRESETS[RctMode(payload["mode"])],
+            "setpoint": payload["setpoint"],
+        }
+
+    for entity in profile:
+        if entity.entity_id in applied:
+            entity.async_write_ha_state()
+
+    if failed:
+        raise HomeAssistantError(f"Could not set heating state of {', '.join(failed)}")
+
+    return applied
+
+
+class HASSXComfortRcTouch(XComfortRoomEntity, ClimateEntity):
+    _attr_temperature_unit = UnitOfTemperature.CELSIUS
+    _attr_hvac_modes = [HVACMode.AUTO]
+    _attr_hvac_mode = HVACMode.AUTO
     _attr_supported_features = SUPPORT_FLAGS
+    _attr_preset_modes = list(PRESETS.values())
+    _attr_should_poll = False
 
     def __init__(self, hass: HomeAssistant, hub: XComfortHub, room: Room):
         self.hass = hass
@@ -73,15 +133,28 @@ class HASSXComfortRcTouch(ClimateEntity):
 
         self._unique_id = f"climate_{DOMAIN}_{hub.identifier}-{room.room_id}"
 
+        self._attr_name = self._name
+        self._attr_unique_id = self._unique_id
+        self._attr_device_info = {
+            "identifiers": {(DOMAIN, self._unique_id)},
+            "name": self._name,
+            "manufacturer": "Eaton",
+            "model": "RC Touch",
+            "via_device": hub.hub_id,
+        }
+        self._update_attributes()
+
     async def async_added_to_hass(self):
         log(f"Added to hass {self._name} ")
         if self._room.state is None:
             log(f"State is null for {self._name}")
         else:
             self._room.state.subscribe(lambda state: self._state_change(state))
+        await super().async_added_to_hass()
 
-    def _state_change(self, state):
+    def _state_change(self, state, restored=False):
         self._state = state
+        self._restored = restored
 
         if self._state is not None:
             if "currentMode" in state.raw:
@@ -90,23 +163,56 @@ class HASSXComfortRcTouch(ClimateEntity):
                 self.rctpreset = RctMode(state.raw["mode"])
             self.temperature = state.temperature
             self.currentsetpoint = state.setpoint
+            self._update_attributes()
 
             log(f"State changed {self._name} : {state}")
 
             self.schedule_update_ha_state()
 
+    def _update_attributes(self):
+        """Recomputes the state attributes, call after every change of state or mode."""
+        self._attr_extra_state_attributes = self._restored_attributes
+        self._attr_current_temperature = self.temperature
+        self._attr_target_temperature = self.currentsetpoint
+        self._attr_preset_mode = PRESETS.get(self.rctpreset)
+
+        if self._state is None:
+            self._attr_min_temp = 5.0
+            self._attr_max_temp = 40.0
+            self._attr_current_humidity = None
+            self._attr_hvac_action = None
+            return
+
+        setpointrange = self._room.bridge.rctsetpointallowedvalues[self.rctpreset]
+        self._attr_min_temp = setpointrange.Min
+        self._attr_max_temp = setpointrange.Max
+
+        if self._state.humidity is None:
+            self._attr_current_humidity = None
+        else:
+            self._attr_current_humidity = int(self._state.humidity)
+
+        if self._state.power is None:
+            self._attr_hvac_action = None
+        elif self._state.power > 0:
+            self._attr_hvac_action = HVACAction.HEATING
+        else:
+            self._attr_hvac_action = HVACAction.IDLE
+
     async def async_set_preset_mode(self, preset_mode):
         log(f"Set Preset mode {preset_mode}")
 
-        if preset_mode == "Cool":
+        if preset_mode == PRESET_COOL:
             mode = RctMode.Cool
         if preset_mode == PRESET_ECO:
             mode = RctMode.Eco
         if preset_mode == PRESET_COMFORT:
             mode = RctMode.Comfort
         if self.rctpreset != mode:
-            await self._room.set_mode(mode)
+            with command_priority(self._context):
+                await self._room.set_mode(mode)
             self.rctpreset = mode
+            self._update_attributes()
             self.schedule_update_ha_state()
 
     async def async_set_temperature(self, **kwargs):
@@ -135,84 +241,40 @@ class HASSXComfortRcTouch(ClimateEntity):
             "setpoint": setpoint,
             "confirmed": False,
         }
-        await self._room.bridge.send_message(Messages.SET_HEATING_STATE, payload)
+        with command_priority(self._context):
+            await self._room.bridge.send_message(Messages.SET_HEATING_STATE, payload)
         self._room.modesetpoints[self.rctpreset] = setpoint
         self.currentsetpoint = setpoint
+        self._update_attributes()
         # After moving everything to base library, ideally line below should be the entry point
         # into the library for setting target temperature.
         # await self._room.set_target_temperature(kwargs["temperature"])
 
-    @property
-    def device_info(self):
-        return {
-            "identifiers": {(DOMAIN, self.unique_id)},
-            "name": self._name,
-            "manufacturer": "Eaton",
-            "model": "RC Touch",
-            "via_device": self.hub.hub_id,
-        }
+    def heating_state(self, mode: RctMode | None, setpoint: float | None, allowed) -> dict:
+        """SET_HEATING_STATE payload changing mode and setpoint at once.
 
-    @property
-    def name(self):
-        """Return the display name of this light."""
-        return self._name
-
-    @property
-    def unique_id(self):
-        """Return the unique ID."""
-        return self._unique_id
-
-    @property
-    def should_poll(self) -> bool:
-        return False
-
-    @property
-    def current_temperature(self):
-        """Return the current temperature."""
-        return self.temperature
-
-    @property
-    def hvac_mode(self):
-        return HVAC_MODE_AUTO
-
-    @property
-    def current_humidity(self):
-        """Return the current humidity."""
-        return int(self._state.humidity)
-
-    @property
-    def hvac_action(self):
-        if self._state.power > 0:
-            return CURRENT_HVAC_HEAT
-        else:
-            return CURRENT_HVAC_IDLE
+        Without a setpoint, the one stored for the mode is used. The setpoint
+        is clamped to the range the bridge allows for the mode.
+        """
+        mode = mode or self.rctpreset
+        if setpoint is None:
+            setpoint = self._room.modesetpoints.get(mode, self.currentsetpoint)
 
-    @property
-    def max_temp(self):
-        if self._state is None:
-            return 40.0
-        return self._room.bridge.rctsetpointallowedvalues[self.rctpreset].Max
+        setpointrange = allowed[mode]
+        setpoint = min(setpointrange.Max, max(setpointrange.Min, setpoint))
 
-    @property
-    def min_temp(self):
-        if self._state is None:
-            return 5.0
-        return self._room.bridge.rctsetpointallowedvalues[self.rctpreset].Min
-
-    @property
-    def target_temperature(self):
-        """Returns the setpoint from RC touch, e.g. target_temperature"""
-        return self.currentsetpoint
-
-    @property
-    def preset_modes(self):
-        return ["Cool", PRESET_ECO, PRESET_COMFORT]
-
-    @property
-    def preset_mode(self):
-        if self.rctpreset == RctMode.Cool:
-            return "Cool"
-        if self.rctpreset == RctMode.Eco:
-            return PRESET_ECO
-        if self.rctpreset == RctMode.Comfort:
-            return PRESET_COMFORT
+        state = self._room.state.value
+        return {
+            "roomId": self._room.room_id,
+            "mode": mode.value,
+            "state": (state.rctstate if state is not None else self.rctstate).value,
+            "setpoint": setpoint,
+            "confirmed": False,
+        }
+
+    def applied_heating_state(self, mode: RctMode, setpoint: float):
+        """Records a mode and setpoint sent to the bridge, without writing the state."""
+        self._room.modesetpoints[mode] = setpoint
+        self.rctpreset = mode
+        self.currentsetpoint = setpoint
+        self._update_attributes()
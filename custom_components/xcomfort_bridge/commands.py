@@ -0,0 +1,214 @@
+"""Prioritized, rate limited queue for commands sent to the bridge."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+import logging
+import time
+from typing import Awaitable, Callable
+
+from homeassistant.core import Context
+
+from .const import COMMAND_BURST, COMMAND_RATE
+
+_LOGGER = logging.getLogger(__name__)
+
+# Priority classes, lower values are sent first.
+PRIORITY_INTERACTIVE = 0
+PRIORITY_AUTOMATION = 1
+PRIORITY_BULK = 2
+PRIORITIES = (PRIORITY_INTERACTIVE, PRIORITY_AUTOMATION, PRIORITY_BULK)
+
+_priority: ContextVar[int] = ContextVar(
+    "xcomfort_command_priority", default=PRIORITY_AUTOMATION
+)
+
+
+def priority_for(context: Context | None) -> int:
+    """Commands started by a user are interactive, everything else is automation."""
+    if context is not None and context.user_id is not None:
+        return PRIORITY_INTERACTIVE
+    return PRIORITY_AUTOMATION
+
+
+@contextmanager
+def command_priority(priority: int | Context | None):
+    """Sends the commands issued inside the block with the given priority.
+
+    Accepts a priority class or the Home Assistant context of the service
+    call that issues the commands.
+    """
+    if not isinstance(priority, int):
+        priority = priority_for(priority)
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def set_task_priority(priority: int):
+    """Sets the priority for the rest of the current task."""
+    _priority.set(priority)
+
+
+def _target(payload: dict):
+    if "deviceId" in payload:
+        return ("device", payload["deviceId"])
+    if "roomId" in payload:
+        return ("room", payload["roomId"])
+    return ("bridge", None)
+
+
+class Command:
+    def __init__(self, message_type, payload: dict):
+        self.message_type = message_type
+        self.payload = payload
+        self.queued = time.monotonic()
+        self.waiters: list[asyncio.Future] = []
+
+
+class CommandScheduler:
+    """Sends bridge commands in priority order within a shared rate limit.
+
+    Every priority class keeps one queue per device or room, served round
+    robin, so a target with many pending commands cannot starve the others.
+    A command that has not been sent yet is replaced when the same target
+    gets a newer command of the same type, only the final state matters.
+
+    Commands for one target are always sent in the order they were issued.
+    When a target gets a command with a higher priority, its pending
+    commands of lower priority move ahead of it into the same queue.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[object, dict], Awaitable[None]],
+        rate: float = COMMAND_RATE,
+        burst: float = COMMAND_BURST,
+    ):
+        self._send = send
+        self._rate = rate
+        self._burst = burst
+        self._tokens = burst
+        self._refilled = time.monotonic()
+        self._queues: dict[int, OrderedDict[tuple, deque[Command]]] = {
+            priority: OrderedDict() for priority in PRIORITIES
+        }
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def pending(self) -> int:
+        return sum(
+            len(commands)
+            for queues in self._queues.values()
+            for commands in queues.values()
+        )
+
+    async def submit(self, message_type, payload: dict):
+        """Queues a command and waits until it has been sent."""
+        priority = _priority.get()
+        target = _target(payload)
+        queue = self._queues[priority].setdefault(target, deque())
+
+        # Older commands for the target that would be sent later are promoted,
+        # so this one is still the last the target receives.
+        for lower in PRIORITIES[PRIORITIES.index(priority) + 1 :]:
+            queue.extend(self._queues[lower].pop(target, ()))
+
+        if queue and queue[-1].message_type == message_type:
+            command = queue[-1]
+            command.payload = payload
+        else:
+            command = Command(message_type, payload)
+            queue.append(command)
+
+        future = asyncio.get_running_loop().create_future()
+        command.waiters.append(future)
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        self._wakeup.set()
+
+        await future
+
+    def discard(self, payload: dict, priority: int):
+        """Drops the pending commands of the payload's target in one priority class.
+
+        Waiters of the dropped commands complete as if they had been sent.
+        """
+        for command in self._queues[priority].pop(_target(payload), ()):
+            for waiter in command.waiters:
+                if not waiter.done():
+                    waiter.set_result(None)
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+        for queues in self._queues.values():
+            for commands in queues.values():
+                for command in commands:
+                    for waiter in command.waiters:
+                        waiter.cancel()
+            queues.clear()
+
+    def _next(self) -> tuple[int, Command] | None:
+        for priority, queues in self._queues.items():
+            if not queues:
+                continue
+            target, commands = next(iter(queues.items()))
+            command = commands.popleft()
+            if commands:
+                queues.move_to_end(target)
+            else:
+                del queues[target]
+            return priority, command
+        return None
+
+    async def _take_token(self):
+        while True:
+            now = time.monotonic()
+            self._tokens = min(
+                self._burst, self._tokens + (now - self._refilled) * self._rate
+            )
+            self._refilled = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self._rate)
+
+    async def _run(self):
+        while True:
+            if not self.pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+
+            # The command is picked after waiting for the budget, so one that
+            # arrives in the meantime with a higher priority goes first.
+            await self._take_token()
+            picked = self._next()
+            if picked is None:
+                # Everything pending was discarded while waiting, keep the budget.
+                self._tokens += 1
+                continue
+            priority, command = picked
+
+            try:
+                await self._send(command.message_type, command.payload)
+            except Exception as e:
+                for waiter in command.waiters:
+                    if not waiter.done():
+                        waiter.set_exception(e)
+            else:
+                for waiter in command.waiters:
+                    if not waiter.done():
+                        waiter.set_result(None)
+
+            _LOGGER.debug(
+                f"Sent {command.message_type} with priority {priority} "
+                f"after {(time.monotonic() - command.queued) * 1000:.1f}ms, {self.pending} pending"
+            )
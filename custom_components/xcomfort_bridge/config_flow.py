@@ -16,10 +16,19 @@ from homeassistant.core import callback
 from homeassistant.helpers import aiohttp_client, config_validation as cv
 from homeassistant.helpers.typing import ConfigType
 
-from .const import CONF_AUTH_KEY, CONF_IDENTIFIER, DOMAIN
+from .const import CONF_AUTH_KEY, CONF_IDENTIFIER, CONF_IMPORT_STATISTICS, DOMAIN
+from .discovery import (
+    CannotConnect,
+    InvalidAuth,
+    async_discover_bridges,
+    async_local_hosts,
+    async_validate_auth,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
+MANUAL_ENTRY = "manual"
+
 
 @config_entries.HANDLERS.register(DOMAIN)
 class XComfortBridgeConfigFlow(config_entries.ConfigFlow):
@@ -29,6 +38,12 @@ class XComfortBridgeConfigFlow(config_entries.ConfigFlow):
 
     def __init__(self):
         self.data = {}
+        self.discovered = {}
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        return XComfortBridgeOptionsFlow()
 
     async def async_step_user(self, user_input=None):
 
@@ -36,20 +51,68 @@ class XComfortBridgeConfigFlow(config_entries.ConfigFlow):
         if entries:
             return self.async_abort(reason="already_setup")
 
-        errors = {}
+        session = aiohttp_client.async_get_clientsession(self.hass)
+        hosts = await async_local_hosts(self.hass)
+        self.discovered = await async_discover_bridges(session, hosts)
+
+        if self.discovered:
+            return await self.async_step_pick()
+
+        return await self.async_step_manual()
+
+    async def async_step_pick(self, user_input=None):
+        """Lets the user choose one of the discovered bridges."""
 
         if user_input is not None:
+            if user_input[CONF_IP_ADDRESS] == MANUAL_ENTRY:
+                return await self.async_step_manual()
 
             self.data[CONF_IP_ADDRESS] = user_input[CONF_IP_ADDRESS]
-            self.data[CONF_AUTH_KEY] = user_input[CONF_AUTH_KEY]
-            self.data[CONF_IDENTIFIER] = user_input.get(CONF_IDENTIFIER)
+            return await self.async_step_auth()
 
-            await self.async_set_unique_id(self.data[CONF_IP_ADDRESS])
+        choices = {
+            address: f"{address} ({device_id})" if device_id else address
+            for address, device_id in self.discovered.items()
+        }
+        choices[MANUAL_ENTRY] = "Enter address manually"
 
-            return self.async_create_entry(
-                title=f"{user_input[CONF_IP_ADDRESS]}",
-                data=user_input,
-            )
+        data_schema = {
+            vol.Required(CONF_IP_ADDRESS): vol.In(choices),
+        }
+
+        return self.async_show_form(step_id="pick", data_schema=vol.Schema(data_schema))
+
+    async def async_step_auth(self, user_input=None):
+        """Asks for the auth key of the chosen bridge."""
+
+        errors = {}
+
+        if user_input is not None:
+            user_input = {CONF_IP_ADDRESS: self.data[CONF_IP_ADDRESS], **user_input}
+            errors = await self._async_validate(user_input)
+            if not errors:
+                return await self._async_create(user_input)
+
+        data_schema = {
+            vol.Required(CONF_AUTH_KEY): str,
+            vol.Optional(CONF_IDENTIFIER, default="XComfort Bridge"): str,
+        }
+
+        return self.async_show_form(
+            step_id="auth",
+            data_schema=vol.Schema(data_schema),
+            errors=errors,
+            description_placeholders={"address": self.data[CONF_IP_ADDRESS]},
+        )
+
+    async def async_step_manual(self, user_input=None):
+
+        errors = {}
+
+        if user_input is not None:
+            errors = await self._async_validate(user_input)
+            if not errors:
+                return await self._async_create(user_input)
 
         data_schema = {
             vol.Required(CONF_IP_ADDRESS): str,
@@ -58,8 +121,52 @@ class XComfortBridgeConfigFlow(config_entries.ConfigFlow):
         }
 
         return self.async_show_form(
-            step_id="user", data_schema=vol.Schema(data_schema), errors=errors
+            step_id="manual", data_schema=vol.Schema(data_schema), errors=errors
+        )
+
+    async def _async_validate(self, user_input) -> dict:
+        """Runs a real handshake with the bridge, returns form errors."""
+        session = aiohttp_client.async_get_clientsession(self.hass)
+        try:
+            await async_validate_auth(
+                session, user_input[CONF_IP_ADDRESS], user_input[CONF_AUTH_KEY]
+            )
+        except CannotConnect:
+            return {"base": "cannot_connect"}
+        except InvalidAuth:
+            return {"base": "invalid_auth"}
+        return {}
+
+    async def _async_create(self, user_input):
+        self.data[CONF_IP_ADDRESS] = user_input[CONF_IP_ADDRESS]
+        self.data[CONF_AUTH_KEY] = user_input[CONF_AUTH_KEY]
+        self.data[CONF_IDENTIFIER] = user_input.get(CONF_IDENTIFIER)
+
+        await self.async_set_unique_id(self.data[CONF_IP_ADDRESS])
+
+        return self.async_create_entry(
+            title=f"{user_input[CONF_IP_ADDRESS]}",
+            data=user_input,
         )
 
     async def async_step_import(self, import_data: dict):
-        return await self.async_step_user(import_data)
+        entries = self.hass.config_entries.async_entries(DOMAIN)
+        if entries:
+            return self.async_abort(reason="already_setup")
+
+        return await self.async_step_manual(import_data)
+
+
+class XComfortBridgeOptionsFlow(config_entries.OptionsFlow):
+    async def async_step_init(self, user_input=None):
+        if user_input is not None:
+            return self.async_create_entry(data=user_input)
+
+        data_schema = {
+            vol.Optional(
+                CONF_IMPORT_STATISTICS,
+                default=self.config_entry.options.get(CONF_IMPORT_STATISTICS, False),
+            ): bool,
+        }
+
+        return self.async_show_form(step_id="init", data_schema=vol.Schema(data_schema))
@@ -0,0 +1,127 @@
+"""Secure bridge connection that reports every inbound frame to the hub."""
+
+from __future__ import annotations
+
+import binascii
+import json
+import time
+from base64 import b64encode
+from typing import Callable
+
+import aiohttp
+from Crypto.Cipher import AES
+from Crypto.Util.strxor import strxor
+from xcomfort.connection import ConnectionState, SecureBridgeConnection, _pad_string
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    _loads = orjson.loads
+
+    def _dumps(data) -> bytes:
+        return orjson.dumps(data)
+
+else:
+
+    def _loads(data):
+        return json.loads(bytes(data))
+
+    def _dumps(data) -> bytes:
+        return json.dumps(data).encode()
+
+
+class XComfortConnection(SecureBridgeConnection):
+    """Connection that calls `on_frame` for every decrypted frame.
+
+    `on_frame` gets the frame and the monotonic time it arrived, taken
+    before decrypting and parsing it. The library connection drops frames without a payload, such as the
+    ACKs the bridge sends for our own messages, which the hub needs to
+    measure round trip times.
+
+    Frames are decrypted into a reused buffer and parsed with orjson when
+    it is installed, which Home Assistant ships with. Every frame is
+    encrypted with the same key and IV, so instead of setting up a new CBC
+    cipher per frame, one ECB cipher is kept and the CBC chaining is done
+    with a single XOR against the IV and the shifted ciphertext.
+    """
+
+    def __init__(
+        self, websocket, key, iv, device_id, on_frame: Callable[[dict, float], None]
+    ):
+        super().__init__(websocket, key, iv, device_id)
+        self._on_frame = on_frame
+        self._buffer = bytearray(4096)
+        self._ecb = AES.new(key, AES.MODE_ECB)
+
+    @classmethod
+    def wrap(
+        cls, connection: SecureBridgeConnection, on_frame: Callable[[dict, float], None]
+    ):
+        """Takes over an already authenticated library connection."""
+        wrapped = cls(
+            connection.websocket,
+            connection.key,
+            connection.iv,
+            connection.device_id,
+            on_frame,
+        )
+        wrapped.mc = connection.mc
+        return wrapped
+
+    def _decrypt(self, data) -> dict:
+        # Like the library, invalid characters such as the trailing \u0004 are skipped.
+        ct = binascii.a2b_base64(data)
+        size = len(ct)
+        if size > len(self._buffer):
+            self._buffer = bytearray(max(size, 2 * len(self._buffer)))
+
+        view = memoryview(self._buffer)[:size]
+        self._ecb.decrypt(ct, output=view)
+        strxor(view, self.iv + ct[: -AES.block_size], output=view)
+
+        # Messages are padded with zero bytes up to the AES block size.
+        end = size
+        while end and view[end - 1] == 0:
+            end -= 1
+
+        if not end:
+            return {}
+
+        return _loads(view[:end])
+
+    async def pump(self):
+        self.state = ConnectionState.Loading
+
+        await self.send_message(240, {})
+        await self.send_message(242, {})
+        await self.send_message(2, {})
+
+        async for msg in self.websocket:
+            if msg.type == aiohttp.WSMsgType.TEXT:
+                received = time.monotonic()
+                result = self._decrypt(msg.data)
+                self._on_frame(result, received)
+
+                if "mc" in result:
+                    # ACK
+                    await self.send({"type_int": 1, "ref": result["mc"]})
+
+                if "payload" in result:
+                    self._messageSubject.on_next(result)
+
+            elif msg.type == aiohttp.WSMsgType.ERROR:
+                break
+
+    async def receive(self):
+        msg = await self.websocket.receive()
+
+        return self._decrypt(msg.data)
+
+    async def send(self, data):
+        msg = _pad_string(_dumps(data))
+        msg = AES.new(self.key, AES.MODE_CBC, self.iv).encrypt(msg)
+        msg = b64encode(msg).decode() + "\u0004"
+        await self.websocket.send_str(msg)
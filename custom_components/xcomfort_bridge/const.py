@@ -5,5 +5,58 @@ CONF_AUTH_KEY = "auth_key"
 CONF_IDENTIFIER = "identifier"
 CONF_DIMMING = "dimming"
 CONF_GATEWAYS = "gateways"
+CONF_IMPORT_STATISTICS = "import_statistics"
 
 VERBOSE = True
+
+ATTR_PATH = "path"
+ATTR_SPEED = "speed"
+
+SERVICE_START_RECORDING = "start_recording"
+SERVICE_STOP_RECORDING = "stop_recording"
+SERVICE_REPLAY_RECORDING = "replay_recording"
+SERVICE_APPLY_HEATING_PROFILE = "apply_heating_profile"
+
+ATTR_ROOMS = "rooms"
+ATTR_MODE = "mode"
+ATTR_SETPOINT = "setpoint"
+
+# Heartbeat intervals in seconds. The interval doubles while the link is
+# healthy, and drops back to the minimum as soon as a probe fails.
+HEARTBEAT_MIN_INTERVAL = 10
+HEARTBEAT_MAX_INTERVAL = 120
+HEARTBEAT_TIMEOUT = 5
+
+# Shared command budget for light transitions, in dimm commands per second.
+FADE_COMMAND_RATE = 10
+FADE_COMMAND_BURST = 5
+FADE_TICK = 0.1
+
+# Rate limit for all commands sent to one bridge, in commands per second.
+COMMAND_RATE = 20
+COMMAND_BURST = 10
+
+# Bridge discovery, a full /24 network is probed in two waves.
+DISCOVERY_PORT = 80
+DISCOVERY_TIMEOUT = 1.0
+DISCOVERY_CONCURRENCY = 128
+# Upper bound for the secure handshake and login when validating an auth key.
+VALIDATE_TIMEOUT = 15
+
+EVENT_XCOMFORT = "xcomfort_bridge_event"
+ATTR_XCOMFORT_ID = "xcomfort_id"
+
+# Device types of push buttons and rockers, which only produce events.
+BUTTON_DEVICE_TYPES = {220}
+
+TRIGGER_ON_PRESSED = "on_pressed"
+TRIGGER_OFF_PRESSED = "off_pressed"
+TRIGGER_TYPES = {TRIGGER_ON_PRESSED, TRIGGER_OFF_PRESSED}
+
+# Seconds between periodic writes of the state snapshot.
+SNAPSHOT_INTERVAL = 900
+ATTR_RESTORED = "restored"
+
+# Seconds per power sample period when statistics are imported directly,
+# live power and energy sensors also only publish once per period.
+STATISTICS_PERIOD = 300
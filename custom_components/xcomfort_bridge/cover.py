@@ -6,16 +6,19 @@ from xcomfort.devices import Shade
 
 from homeassistant.components.cover import (
     ATTR_POSITION,
+    CoverDeviceClass,
     CoverEntityFeature,
-    DEVICE_CLASS_SHADE,
     CoverEntity,
 )
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity import Entity
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
+from .commands import command_priority
 from .const import DOMAIN, VERBOSE
+from .entity import XComfortDeviceEntity
 from .hub import XComfortHub
 
 _LOGGER = logging.getLogger(__name__)
@@ -38,22 +41,17 @@ async def async_setup_entry(
 
     hub = XComfortHub.get_hub(hass, entry)
 
-    devices = hub.devices
-
-    _LOGGER.info(f"Found {len(devices)} xcomfort devices")
-
     shades = list()
-    for device in devices:
-        if isinstance(device, Shade):
-            _LOGGER.info(f"Adding {device}")
-            shade = HASSXComfortShade(hass, hub, device)
-            shades.append(shade)
+    for device in hub.devices_for(Platform.COVER):
+        _LOGGER.info(f"Adding {device}")
+        shade = HASSXComfortShade(hass, hub, device)
+        shades.append(shade)
 
     _LOGGER.info(f"Added {len(shades)} shades")
     async_add_entities(shades)
 
 
-class HASSXComfortShade(CoverEntity):
+class HASSXComfortShade(XComfortDeviceEntity, CoverEntity):
     def __init__(self, hass: HomeAssistant, hub: XComfortHub, device: Shade):
         self.hass = hass
         self.hub = hub
@@ -65,9 +63,23 @@ class HASSXComfortShade(CoverEntity):
 
         self._unique_id = f"shade_{DOMAIN}_{hub.identifier}-{device.device_id}"
 
-    @property
-    def device_class(self):
-        return DEVICE_CLASS_SHADE
+        self._attr_name = self._name
+        self._attr_unique_id = self._unique_id
+        self._attr_should_poll = False
+        self._attr_device_class = CoverDeviceClass.SHADE
+        self._attr_device_info = {
+            "identifiers": {(DOMAIN, self._unique_id)},
+            "name": self._name,
+            "manufacturer": "Eaton",
+            "model": "XXX",
+            "sw_version": "Unknown",
+            "via_device": hub.hub_id,
+        }
+        self._attr_supported_features = (
+            CoverEntityFeature.OPEN | CoverEntityFeature.CLOSE | CoverEntityFeature.STOP
+        )
+        if device.supports_go_to:
+            self._attr_supported_features |= CoverEntityFeature.SET_POSITION
 
     async def async_added_to_hass(self):
         log(f"Added to hass {self._name} ")
@@ -75,9 +87,12 @@ class HASSXComfortShade(CoverEntity):
             log(f"State is null for {self._name}")
         else:
             self._device.state.subscribe(lambda state: self._state_change(state))
+        await super().async_added_to_hass()
 
-    def _state_change(self, state):
+    def _state_change(self, state, restored=False):
         self._state = state
+        self._restored = restored
+        self._update_attributes()
 
         should_update = self._state is not None
 
@@ -86,74 +101,46 @@ class HASSXComfortShade(CoverEntity):
         if should_update:
             self.schedule_update_ha_state()
 
-    @property
-    def is_closed(self) -> bool | None:
-        if not self._state:
-            return None
-        return self._state.is_closed
-
-    @property
-    def device_info(self):
-        return {
-            "identifiers": {(DOMAIN, self.unique_id)},
-            "name": self.name,
-            "manufacturer": "Eaton",
-            "model": "XXX",
-            "sw_version": "Unknown",
-            "via_device": self.hub.hub_id,
-        }
-
-    @property
-    def name(self):
-        """Return the display name of this cover."""
-        return self._name
-
-    @property
-    def unique_id(self):
-        """Return the unique ID."""
-        return self._unique_id
+    def _update_attributes(self):
+        """Recomputes the state attributes, call after every change of _state."""
+        self._attr_extra_state_attributes = self._restored_attributes
 
-    @property
-    def should_poll(self) -> bool:
-        return False
+        if not self._state:
+            self._attr_is_closed = None
+            self._attr_current_cover_position = None
+            return
 
-    @property
-    def supported_features(self):
-        """Flag supported features."""
-        supported_features = CoverEntityFeature.OPEN | CoverEntityFeature.CLOSE | CoverEntityFeature.STOP
-        if self._device.supports_go_to:
-            supported_features |= CoverEntityFeature.SET_POSITION
-        return supported_features
+        self._attr_is_closed = self._state.is_closed
+        if self._state.position is None:
+            self._attr_current_cover_position = None
+        else:
+            # xcomfort interprets 90% to be almost fully closed,
+            # while HASS UI makes 90% look almost open, so we
+            # invert.
+            self._attr_current_cover_position = 100 - self._state.position
 
     async def async_open_cover(self, **kwargs):
         """Open the cover."""
-        await self._device.move_up()
+        with command_priority(self._context):
+            await self._device.move_up()
     
     async def async_close_cover(self, **kwargs):
         """Close cover."""
-        await self._device.move_down()
+        with command_priority(self._context):
+            await self._device.move_down()
 
     async def async_stop_cover(self, **kwargs):
         """Stop the cover."""
-        await self._device.move_stop()
+        with command_priority(self._context):
+            await self._device.move_stop()
 
     def update(self):
         pass
 
-    @property
-    def current_cover_position(self) -> int | None:
-        if self._state:
-            if self._state.position is None:
-                return None  # Return None if position is NoneType
-            # xcomfort interprets 90% to be almost fully closed,
-            # while HASS UI makes 90% look almost open, so we
-            # invert.
-            return 100 - self._state.position
-        return None  # Return None if _state is falsy or does not exist
-
     async def async_set_cover_position(self, **kwargs) -> None:
         """Move the cover to a specific position."""
         if (position := kwargs.get(ATTR_POSITION)) is not None:
             # See above comment
             position = 100 - position
-            await self._device.move_to_position(position)
+            with command_priority(self._context):
+                await self._device.move_to_position(position)
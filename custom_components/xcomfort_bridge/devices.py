@@ -0,0 +1,17 @@
+"""Device types the xcomfort library does not know about yet."""
+
+from xcomfort.devices import BridgeDevice
+
+
+class Rocker(BridgeDevice):
+    """Push button or rocker, its presses are fired as events by the hub."""
+
+    def __init__(self, bridge, device_id, name, comp_id):
+        BridgeDevice.__init__(self, bridge, device_id, name)
+
+        self.comp_id = comp_id
+
+    def __str__(self):
+        return f'Rocker({self.device_id}, "{self.name}")'
+
+    __repr__ = __str__
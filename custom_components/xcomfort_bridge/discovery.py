@@ -0,0 +1,144 @@
+"""Discovery and validation of xComfort bridges on the local network."""
+
+from __future__ import annotations
+
+import asyncio
+import ipaddress
+import json
+import logging
+
+import aiohttp
+from xcomfort.connection import setup_secure_connection
+from xcomfort.messages import Messages
+
+from homeassistant.components import network
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import (
+    DISCOVERY_CONCURRENCY,
+    DISCOVERY_PORT,
+    DISCOVERY_TIMEOUT,
+    VALIDATE_TIMEOUT,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Smallest network we scan, larger subnets are narrowed down to the /24 around us.
+MIN_NETWORK_PREFIX = 24
+
+# The only error the library raises when the bridge rejects the credentials.
+LOGIN_FAILED = "Login failed"
+
+
+class CannotConnect(HomeAssistantError):
+    """The bridge could not be reached."""
+
+
+class InvalidAuth(HomeAssistantError):
+    """The bridge rejected the auth key."""
+
+
+def bridge_address(host: str, port: int = DISCOVERY_PORT) -> str:
+    """Address as the bridge library expects it, with the port only if non-default."""
+    return host if port == DISCOVERY_PORT else f"{host}:{port}"
+
+
+async def async_local_hosts(hass: HomeAssistant) -> list[str]:
+    """Hosts on the IPv4 networks of the enabled network adapters."""
+    hosts = []
+    for adapter in await network.async_get_adapters(hass):
+        if not adapter["enabled"]:
+            continue
+        for ip_info in adapter["ipv4"]:
+            prefix = max(ip_info["network_prefix"], MIN_NETWORK_PREFIX)
+            subnet = ipaddress.ip_network(
+                f"{ip_info['address']}/{prefix}", strict=False
+            )
+            if subnet.is_loopback:
+                continue
+            hosts.extend(
+                str(host) for host in subnet.hosts() if str(host) != ip_info["address"]
+            )
+    return hosts
+
+
+async def async_probe_bridge(
+    session: aiohttp.ClientSession,
+    address: str,
+    timeout: float = DISCOVERY_TIMEOUT,
+) -> str | None:
+    """Returns the device id if an xComfort bridge answers on the address.
+
+    A bridge greets every websocket client with an unencrypted
+    CONNECTION_START message, or a NACK when all its client slots are used.
+    """
+    try:
+        async with asyncio.timeout(timeout):
+            async with session.ws_connect(f"http://{address}/") as ws:
+                msg = await ws.receive()
+    except (aiohttp.ClientError, OSError, TimeoutError):
+        return None
+
+    if msg.type != aiohttp.WSMsgType.TEXT:
+        return None
+
+    try:
+        data = json.loads(msg.data.rstrip("\u0004"))
+    except ValueError:
+        return None
+
+    if not isinstance(data, dict):
+        return None
+    if data.get("type_int") == Messages.CONNECTION_START:
+        return str(data.get("payload", {}).get("device_id", ""))
+    if data.get("type_int") == Messages.NACK:
+        return ""
+    return None
+
+
+async def async_discover_bridges(
+    session: aiohttp.ClientSession,
+    hosts: list[str],
+    port: int = DISCOVERY_PORT,
+    timeout: float = DISCOVERY_TIMEOUT,
+    concurrency: int = DISCOVERY_CONCURRENCY,
+) -> dict[str, str]:
+    """Probes the hosts concurrently, returns the bridges found by address."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def probe(address: str):
+        async with semaphore:
+            return address, await async_probe_bridge(session, address, timeout)
+
+    results = await asyncio.gather(
+        *(probe(bridge_address(host, port)) for host in hosts)
+    )
+    bridges = {
+        address: device_id for address, device_id in results if device_id is not None
+    }
+    _LOGGER.info(f"Probed {len(hosts)} hosts, found bridges: {bridges}")
+    return bridges
+
+
+async def async_validate_auth(
+    session: aiohttp.ClientSession,
+    address: str,
+    auth_key: str,
+    timeout: float = VALIDATE_TIMEOUT,
+):
+    """Performs the full secure handshake and login with the bridge."""
+    try:
+        async with asyncio.timeout(timeout):
+            connection = await setup_secure_connection(session, address, auth_key)
+    except (aiohttp.ClientError, OSError, TimeoutError) as e:
+        raise CannotConnect(str(e) or "timed out") from e
+    except Exception as e:
+        # The library raises plain exceptions, also for a busy bridge (NACK),
+        # a declined connection or an unexpected answer. Only a failed login
+        # means the auth key is wrong.
+        if str(e) == LOGIN_FAILED:
+            raise InvalidAuth(str(e)) from e
+        raise CannotConnect(str(e)) from e
+
+    await connection.close()
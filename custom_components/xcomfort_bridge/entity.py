@@ -0,0 +1,68 @@
+"""Base classes shared by the xComfort entities."""
+
+from __future__ import annotations
+
+import logging
+
+from homeassistant.helpers.entity import Entity
+
+from .const import ATTR_RESTORED, VERBOSE
+from .hub import XComfortHub
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def log(msg: str):
+    if VERBOSE:
+        _LOGGER.info(msg)
+
+
+class XComfortEntity(Entity):
+    """Entity that follows the hub's availability and starts from the snapshot.
+
+    Subclasses set `hub` and `_state` in their constructor and implement
+    `_state_change(state, restored=False)`. Static attributes are set once
+    in the constructor, state attributes in `_update_attributes` whenever
+    the state changes.
+    """
+
+    hub: XComfortHub
+    _restored = False
+
+    async def async_added_to_hass(self) -> None:
+        """Call when entity about to be added to hass."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self.hub.register_entity(self))
+
+        if self._state is None:
+            restored = self._restored_state()
+            if restored is not None:
+                log(f"Restored state for {self.name} : {restored}")
+                self._state_change(restored, restored=True)
+
+    @property
+    def available(self) -> bool:
+        return self.hub.available
+
+    @property
+    def _restored_attributes(self) -> dict | None:
+        """Extra state attributes marking a state restored from the snapshot."""
+        return {ATTR_RESTORED: True} if self._restored else None
+
+    def _restored_state(self):
+        """Snapshot state to start from until the bridge reports one, or None."""
+        return None
+
+
+class XComfortDeviceEntity(XComfortEntity):
+    """Entity representing the device in `_device`."""
+
+    def _restored_state(self):
+        return self.hub.restored_device_state(self._device)
+
+
+class XComfortRoomEntity(XComfortEntity):
+    """Entity representing the room in `_room`."""
+
+    def _restored_state(self):
+        return self.hub.restored_room_state(self._room)
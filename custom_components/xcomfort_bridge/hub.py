@@ -4,15 +4,41 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from typing import List
+import time
+from typing import Callable
 
 from xcomfort.bridge import Bridge, State
-from xcomfort.devices import Light, LightState
+from xcomfort.connection import setup_secure_connection
+from xcomfort.messages import Messages
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import ATTR_DEVICE_ID, CONF_TYPE, Platform
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import aiohttp_client, device_registry as dr
+from homeassistant.helpers.entity import Entity
 
-from .const import DOMAIN, VERBOSE
+from .commands import CommandScheduler
+from .connection import XComfortConnection
+from .const import (
+    ATTR_XCOMFORT_ID,
+    BUTTON_DEVICE_TYPES,
+    DOMAIN,
+    EVENT_XCOMFORT,
+    HEARTBEAT_MAX_INTERVAL,
+    HEARTBEAT_MIN_INTERVAL,
+    HEARTBEAT_TIMEOUT,
+    SNAPSHOT_INTERVAL,
+    TRIGGER_OFF_PRESSED,
+    TRIGGER_ON_PRESSED,
+    VERBOSE,
+)
+from .devices import Rocker
+from .discovery import CannotConnect, InvalidAuth, async_validate_auth
+from .power_statistics import PowerStatistics
+from .registry import device_platforms, room_platforms
+from .snapshot import StateSnapshot
+from .traffic import TrafficRecorder
+from .transition import FadeScheduler
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -22,27 +48,225 @@ def log(msg: str):
         _LOGGER.info(msg)
 
 
+class XComfortBridge(Bridge):
+    """Bridge that reports decoded traffic back to the hub."""
+
+    def __init__(self, hub: XComfortHub, ip: str, auth_key: str):
+        super().__init__(ip, auth_key)
+        self._hub = hub
+        # Payloads the devices and rooms were created from, persisted with the snapshot.
+        self.comp_payloads: dict[int, dict] = {}
+        self.device_payloads: dict[int, dict] = {}
+        self.room_payloads: dict[int, dict] = {}
+        self._reported_comps: set[int] = set()
+        self._reported_devices: set[int] = set()
+        self._reported_rooms: set[int] = set()
+        self.handler_errors = 0
+        # Message types without a handler are dropped without building any objects.
+        self._handlers = {
+            message_type.value: getattr(self, f"_handle_{message_type.name}")
+            for message_type in Messages
+            if hasattr(self, f"_handle_{message_type.name}")
+        }
+
+    async def _connect(self):
+        connection = await setup_secure_connection(
+            self._session, self.ip_address, self.authkey
+        )
+        self.connection = XComfortConnection.wrap(connection, self._hub.handle_frame)
+        self.connection_subscription = self.connection.messages.subscribe(
+            self._onMessage
+        )
+
+    def _create_comp_from_payload(self, payload):
+        self.comp_payloads[payload["compId"]] = payload
+        return super()._create_comp_from_payload(payload)
+
+    def _create_device_from_payload(self, payload):
+        self.device_payloads[payload["deviceId"]] = payload
+        if payload["devType"] in BUTTON_DEVICE_TYPES:
+            return Rocker(self, payload["deviceId"], payload["name"], payload["compId"])
+        return super()._create_device_from_payload(payload)
+
+    def _create_room_from_payload(self, payload):
+        self.room_payloads[payload["roomId"]] = payload
+        return super()._create_room_from_payload(payload)
+
+    def _handle_comp_payload(self, payload):
+        self._reported_comps.add(payload["compId"])
+        super()._handle_comp_payload(payload)
+
+    def _handle_device_payload(self, payload):
+        self._reported_devices.add(payload["deviceId"])
+        super()._handle_device_payload(payload)
+
+    def _handle_room_payload(self, payload):
+        self._reported_rooms.add(payload["roomId"])
+        super()._handle_room_payload(payload)
+
+    def seed(self, topology: dict):
+        """Creates comps, devices and rooms from persisted payloads, without any state.
+
+        The bridge updates these objects in place once it sends its data.
+        Comps come first, devices such as shades look up theirs when created.
+        """
+        for payload in topology.get("comps", ()):
+            try:
+                self._add_comp(self._create_comp_from_payload(payload))
+            except (KeyError, TypeError):
+                _LOGGER.warning(f"Ignoring malformed snapshot comp {payload}")
+
+        for payload in topology.get("devices", ()):
+            try:
+                device = self._create_device_from_payload(payload)
+            except (KeyError, TypeError):
+                _LOGGER.warning(f"Ignoring malformed snapshot device {payload}")
+                continue
+            if device is not None:
+                self._add_device(device)
+
+        for payload in topology.get("rooms", ()):
+            try:
+                self._add_room(self._create_room_from_payload(payload))
+            except (KeyError, TypeError):
+                _LOGGER.warning(f"Ignoring malformed snapshot room {payload}")
+
+    def drop_unreported(self):
+        """Removes seeded comps, devices and rooms the bridge no longer has."""
+        for comp_id in set(self._comps) - self._reported_comps:
+            del self._comps[comp_id]
+            self.comp_payloads.pop(comp_id, None)
+        for device_id in set(self._devices) - self._reported_devices:
+            del self._devices[device_id]
+            self.device_payloads.pop(device_id, None)
+        for room_id in set(self._rooms) - self._reported_rooms:
+            del self._rooms[room_id]
+            self.room_payloads.pop(room_id, None)
+
+    @property
+    def topology(self) -> dict:
+        return {
+            "comps": list(self.comp_payloads.values()),
+            "devices": list(self.device_payloads.values()),
+            "rooms": list(self.room_payloads.values()),
+        }
+
+    def _onMessage(self, message):
+        self._hub.handle_inbound(message)
+
+        handler = self._handlers.get(message["type_int"])
+        if handler is None:
+            return
+
+        try:
+            handler(message["payload"])
+        except Exception as e:
+            self.handler_errors += 1
+            self.logger(f"Unknown error with: {handler.__name__}: {str(e)}")
+
+    @staticmethod
+    def _update(target, payload):
+        # Only build state objects someone is subscribed to.
+        if target is not None and target.state.observers:
+            target.handle_state(payload)
+
+    def _handle_SET_DEVICE_STATE(self, payload):
+        self._update(self._devices.get(payload["deviceId"]), payload)
+
+    def _handle_SET_STATE_INFO(self, payload):
+        for item in payload["item"]:
+            if "deviceId" in item:
+                self._update(self._devices.get(item["deviceId"]), item)
+            elif "roomId" in item:
+                self._update(self._rooms.get(item["roomId"]), item)
+            elif "compId" in item:
+                self._update(self._comps.get(item["compId"]), item)
+
+    async def send_message(self, message_type, message):
+        # Entity commands all end up here, they are sent in the scheduler's order.
+        await self._hub.commands.submit(message_type, message)
+
+    async def send_now(self, message_type, message):
+        self._hub.handle_outbound(message_type, message)
+        await super().send_message(message_type, message)
+
+
+class LatencyStats:
+    """Running count, mean and maximum of a latency in seconds."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, latency: float):
+        self.count += 1
+        self.total += latency
+        self.max = max(self.max, latency)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def __str__(self):
+        return f"LatencyStats(count={self.count}, mean={self.mean * 1000:.3f}ms, max={self.max * 1000:.3f}ms)"
+
+
 """Wrapper class over bridge library to emulate hub."""
 class XComfortHub:
     def __init__(self, hass: HomeAssistant, identifier: str, ip: str, auth_key: str):
         """Initialize underlying bridge"""
-        bridge = Bridge(ip, auth_key)
+        bridge = XComfortBridge(self, ip, auth_key)
+        self.hass = hass
         self.bridge = bridge
         self.identifier = identifier
         if self.identifier is None:
             self.identifier = ip
         self._id = ip
         self.devices = list()
+        self.rooms = list()
+        self.platform_devices: dict[Platform, list] = {}
+        self.platform_rooms: dict[Platform, list] = {}
+        # Platforms forwarded for the config entry, unloaded with it.
+        self.loaded_platforms: list[Platform] = []
+        self.buttons: dict[int, Rocker] = {}
+        self.button_device_ids: dict[int, str] = {}
+        self.event_latency = LatencyStats()
+        # Replay hubs handle button presses without firing them on the bus.
+        self.fire_events = True
+        self.recorder: TrafficRecorder | None = None
+        self.entities: list[Entity] = []
+        self.commands = CommandScheduler(bridge.send_now)
+        self.fades = FadeScheduler(self.commands)
+        self.available = True
+        self.rtt: float | None = None
+        self._last_inbound = time.monotonic()
+        self._pong: asyncio.Future | None = None
+        self._heartbeat_task: asyncio.Task | None = None
+        self.snapshot: StateSnapshot | None = None
+        self._snapshot_task: asyncio.Task | None = None
+        self.power_statistics: PowerStatistics | None = None
         log("getting event loop")
         self._loop = asyncio.get_event_loop()
 
     def start(self):
         """Starts the event loop running the bridge."""
         asyncio.create_task(self.bridge.run())
+        self._heartbeat_task = asyncio.create_task(self._heartbeat())
 
     async def stop(self):
         """Stops the bridge event loop.
         Will also shut down websocket, if open."""
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+        if self._snapshot_task is not None:
+            self._snapshot_task.cancel()
+        self.fades.stop()
+        self.commands.stop()
+        if self.power_statistics is not None:
+            await self.power_statistics.async_stop()
+        await self.stop_recording()
+        await self.save_snapshot()
         await self.bridge.close()
 
     async def load_devices(self):
@@ -60,12 +284,305 @@ class XComfortHub:
 
         log(f"loaded {len(self.rooms)} rooms")
 
+        self.bridge.drop_unreported()
+        self._assign_platforms()
+
+    def seed_devices(self) -> bool:
+        """Creates devices and rooms from the snapshot, without waiting for the bridge.
+
+        Returns False when the snapshot has no topology, e.g. on the first start.
+        """
+        if self.snapshot is None or not self.snapshot.topology:
+            return False
+
+        self.bridge.seed(self.snapshot.topology)
+        self.devices = self.bridge._devices.values()
+        self.rooms = self.bridge._rooms.values()
+
+        log(f"seeded {len(self.devices)} devices and {len(self.rooms)} rooms from the snapshot")
+        self._assign_platforms()
+        return True
+
+    async def verify_devices(self, entry: ConfigEntry):
+        """Waits for the bridge data and reloads the entry if the seeded topology was stale."""
+        seeded = self._platform_layout()
+        await self.load_devices()
+        if self._platform_layout() != seeded:
+            log("devices changed since the snapshot, reloading")
+            self.hass.config_entries.async_schedule_reload(entry.entry_id)
+
+    def _assign_platforms(self):
+        self.buttons.clear()
+        self.platform_devices.clear()
+        self.platform_rooms.clear()
+
+        for device in self.devices:
+            if isinstance(device, Rocker):
+                self.buttons[device.device_id] = device
+            for platform in device_platforms(device):
+                self.platform_devices.setdefault(platform, []).append(device)
+
+        for room in self.rooms:
+            # Seeded rooms have no state yet, the restored one decides their platforms.
+            state = room.state.value or self.restored_room_state(room)
+            for platform in room_platforms(room, state):
+                self.platform_rooms.setdefault(platform, []).append(room)
+
+        log(f"platforms in use: {', '.join(self.platforms)}")
+
+    def _platform_layout(self) -> set:
+        # Entities read these once when created, a change needs new entities.
+        devices = {
+            (
+                platform,
+                device.device_id,
+                device.name,
+                getattr(device, "dimmable", None),
+                getattr(device, "supports_go_to", None),
+            )
+            for platform, devices in self.platform_devices.items()
+            for device in devices
+        }
+        rooms = {
+            (platform, room.room_id, room.name)
+            for platform, rooms in self.platform_rooms.items()
+            for room in rooms
+        }
+        buttons = {("button", button.device_id, button.name) for button in self.buttons.values()}
+        return {("device",) + item for item in devices} | {("room",) + item for item in rooms} | buttons
+
+    @callback
+    def register_buttons(self, entry: ConfigEntry):
+        """Creates a device registry entry for every push button and rocker."""
+        registry = dr.async_get(self.hass)
+        for button in self.buttons.values():
+            device = registry.async_get_or_create(
+                config_entry_id=entry.entry_id,
+                identifiers={(DOMAIN, f"button_{self.identifier}-{button.device_id}")},
+                name=button.name,
+                manufacturer="Eaton",
+                model="Push button",
+            )
+            self.button_device_ids[button.device_id] = device.id
+
+        log(f"registered {len(self.buttons)} push buttons")
+
+    @property
+    def platforms(self) -> list[Platform]:
+        """Platforms that have at least one device or room to represent."""
+        return sorted(set(self.platform_devices) | set(self.platform_rooms))
+
+    def devices_for(self, platform: Platform) -> list:
+        return self.platform_devices.get(platform, [])
+
+    def rooms_for(self, platform: Platform) -> list:
+        return self.platform_rooms.get(platform, [])
+
+    async def load_snapshot(self, entry: ConfigEntry):
+        """Loads the persisted states and starts saving them periodically."""
+        self.snapshot = StateSnapshot(self.hass, entry.entry_id)
+        await self.snapshot.async_load()
+        self._snapshot_task = entry.async_create_background_task(
+            self.hass, self._save_snapshot_periodically(), "xcomfort_bridge snapshot"
+        )
+
+    async def save_snapshot(self):
+        if self.snapshot is not None:
+            await self.snapshot.async_save(self.devices, self.rooms, self.bridge.topology)
+
+    async def _save_snapshot_periodically(self):
+        while True:
+            await asyncio.sleep(SNAPSHOT_INTERVAL)
+            try:
+                await self.save_snapshot()
+            except Exception as e:
+                # The next interval tries again.
+                _LOGGER.warning(f"Saving the state snapshot failed: {repr(e)}")
+
+    async def start_power_statistics(self):
+        """Imports room power statistics directly instead of through the sensors."""
+        self.power_statistics = PowerStatistics(
+            self.hass, self.identifier, self.rooms_for(Platform.SENSOR)
+        )
+        await self.power_statistics.async_start()
+
+    def replay_hub(self) -> XComfortHub:
+        """Unconnected hub with this hub's devices and rooms, to replay traffic into.
+
+        It has no entities, never connects and fires no bus events, so
+        replayed messages cannot reach automations or the real bridge.
+        """
+        hub = XComfortHub(
+            self.hass, f"{self.identifier}_replay", self.bridge.ip_address, self.bridge.authkey
+        )
+        hub.fire_events = False
+
+        # Handled like bridge data, so every device and room starts with a complete state.
+        # Copies, the library merges later updates into the payload of a room.
+        topology = self.bridge.topology
+        for payload in topology["comps"]:
+            hub.bridge._handle_comp_payload(dict(payload))
+        for payload in topology["devices"]:
+            hub.bridge._handle_device_payload(dict(payload))
+        for payload in topology["rooms"]:
+            room = self.bridge._rooms.get(payload["roomId"])
+            if room is not None and room.state.value is not None:
+                # Holds the latest merged room data, not only the initial one.
+                payload = room.state.value.raw
+            hub.bridge._handle_room_payload(dict(payload))
+
+        hub.devices = hub.bridge._devices.values()
+        hub.rooms = hub.bridge._rooms.values()
+        hub._assign_platforms()
+        return hub
+
+    def restored_device_state(self, device):
+        """Last known state of a device from before the restart, or None."""
+        if self.snapshot is None:
+            return None
+        return self.snapshot.device_state(device)
+
+    def restored_room_state(self, room):
+        """Last known state of a room from before the restart, or None."""
+        if self.snapshot is None:
+            return None
+        return self.snapshot.room_state(room)
+
+    def handle_frame(self, frame: dict, received: float):
+        """Called for every frame received from the bridge, including ACKs.
+
+        `received` is the monotonic time the websocket frame arrived.
+        """
+        self._last_inbound = received
+        if self._pong is not None and not self._pong.done():
+            self._pong.set_result(self._last_inbound)
+
+    def handle_inbound(self, message: dict):
+        """Called for every decoded message received from the bridge."""
+        if self.recorder is not None and "payload" in message:
+            self.recorder.record_inbound(message["type_int"], message["payload"])
+
+        if self.buttons:
+            message_type = message.get("type_int")
+            if message_type == Messages.SET_STATE_INFO:
+                for item in message["payload"].get("item", ()):
+                    self._handle_button(item)
+            elif message_type == Messages.SET_DEVICE_STATE:
+                self._handle_button(message["payload"])
+
+    def _handle_button(self, payload: dict):
+        """Fires a bus event right away when the payload is a button press."""
+        button = self.buttons.get(payload.get("deviceId"))
+        if button is None:
+            return
+
+        state = payload.get("curstate", payload.get("switch"))
+        if state is None:
+            return
+
+        if self.fire_events:
+            self.hass.bus.async_fire(
+                EVENT_XCOMFORT,
+                {
+                    ATTR_DEVICE_ID: self.button_device_ids.get(button.device_id),
+                    ATTR_XCOMFORT_ID: button.device_id,
+                    "name": button.name,
+                    CONF_TYPE: TRIGGER_ON_PRESSED if state else TRIGGER_OFF_PRESSED,
+                },
+            )
+        # Messages are handled right after their frame, so this includes the decode.
+        self.event_latency.add(time.monotonic() - self._last_inbound)
+        _LOGGER.debug(f"Button {button.name} pressed, {self.event_latency}")
+
+    def handle_outbound(self, message_type, payload: dict):
+        """Called for every message sent to the bridge."""
+        if self.recorder is not None:
+            self.recorder.record_outbound(message_type, payload)
+
+    async def start_recording(self, path: str):
+        """Starts writing bridge traffic to the given file."""
+        await self.stop_recording()
+        log(f"recording bridge traffic to {path}")
+        self.recorder = TrafficRecorder(self.hass, path, self.identifier)
+
+    async def stop_recording(self):
+        """Stops an active recording and flushes it to disk."""
+        recorder, self.recorder = self.recorder, None
+        if recorder is not None:
+            await recorder.async_close()
+            log(f"recorded {recorder.count} messages to {recorder.path}")
+
+    def register_entity(self, entity: Entity) -> Callable[[], None]:
+        """Tracks an entity for availability updates, returns the remover."""
+        self.entities.append(entity)
+        return lambda: self.entities.remove(entity)
+
+    @property
+    def last_inbound_age(self) -> float:
+        """Seconds since the last frame was received from the bridge."""
+        return time.monotonic() - self._last_inbound
+
+    async def _ping(self) -> bool:
+        """Sends a heartbeat and waits for the bridge to answer."""
+        connection = self.bridge.connection
+        if connection is None or self.bridge.state != State.Ready:
+            return False
+
+        # Any frame after the heartbeat proves the link works, normally the ACK.
+        self._pong = self._loop.create_future()
+        sent = time.monotonic()
+        try:
+            await connection.send_message(Messages.HEARTBEAT, {})
+            received = await asyncio.wait_for(self._pong, HEARTBEAT_TIMEOUT)
+        except (asyncio.TimeoutError, ConnectionError, RuntimeError):
+            return False
+        finally:
+            self._pong = None
+
+        self.rtt = received - sent
+        return True
+
+    async def _heartbeat(self):
+        """Probes the link, adapting the interval to the traffic seen."""
+        interval = HEARTBEAT_MIN_INTERVAL
+        while True:
+            await asyncio.sleep(interval)
+
+            # Recent traffic already proves the link is alive, no need to ping.
+            alive = self.last_inbound_age < interval or await self._ping()
+            self._set_available(alive)
+
+            if alive:
+                interval = min(interval * 2, HEARTBEAT_MAX_INTERVAL)
+            else:
+                log(f"bridge link stale, last frame {self.last_inbound_age:.0f}s ago")
+                interval = HEARTBEAT_MIN_INTERVAL
+                if self.bridge.connection is not None:
+                    # Closing the stalled websocket makes the bridge reconnect.
+                    await self.bridge.connection.close()
+
+    @callback
+    def _set_available(self, available: bool):
+        if self.available == available:
+            return
+
+        log(f"bridge {'available' if available else 'unavailable'}, rtt {self.rtt}")
+        self.available = available
+        for entity in self.entities:
+            entity.async_write_ha_state()
+
     @property
     def hub_id(self) -> str:
         return self._id
 
     async def test_connection(self) -> bool:
-        await asyncio.sleep(1)
+        """Checks that the bridge accepts our auth key."""
+        session = aiohttp_client.async_get_clientsession(self.hass)
+        try:
+            await async_validate_auth(session, self.bridge.ip_address, self.bridge.authkey)
+        except (CannotConnect, InvalidAuth) as e:
+            log(f"connection test failed: {e}")
+            return False
         return True
 
     @staticmethod
@@ -6,15 +6,20 @@ from xcomfort.devices import Light
 
 from homeassistant.components.light import (
     ATTR_BRIGHTNESS,
-    SUPPORT_BRIGHTNESS,
+    ATTR_TRANSITION,
+    ColorMode,
     LightEntity,
+    LightEntityFeature,
 )
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity import Entity
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
+from .commands import command_priority
 from .const import DOMAIN, VERBOSE
+from .entity import XComfortDeviceEntity
 from .hub import XComfortHub
 
 _LOGGER = logging.getLogger(__name__)
@@ -37,22 +42,17 @@ async def async_setup_entry(
 
     hub = XComfortHub.get_hub(hass, entry)
 
-    devices = hub.devices
-
-    _LOGGER.info(f"Found {len(devices)} xcomfort devices")
-
     lights = list()
-    for device in devices:
-        if isinstance(device,Light):
-            _LOGGER.info(f"Adding {device}")
-            light = HASSXComfortLight(hass, hub, device)
-            lights.append(light)
+    for device in hub.devices_for(Platform.LIGHT):
+        _LOGGER.info(f"Adding {device}")
+        light = HASSXComfortLight(hass, hub, device)
+        lights.append(light)
 
     _LOGGER.info(f"Added {len(lights)} lights")
     async_add_entities(lights)
 
 
-class HASSXComfortLight(LightEntity):
+class HASSXComfortLight(XComfortDeviceEntity, LightEntity):
     def __init__(self, hass: HomeAssistant, hub: XComfortHub, device: Light):
         self.hass = hass
         self.hub = hub
@@ -60,6 +60,8 @@ class HASSXComfortLight(LightEntity):
         self._device = device
         self._name = device.name
         self._state = None
+        # Brightness from before a fade to off, which leaves the actuator at the minimum.
+        self._dimmvalue_before_off: int | None = None
         self.device_id = device.device_id
 
         # comp = hub.bridge.getComp(self._device._device["compId"])
@@ -67,15 +69,37 @@ class HASSXComfortLight(LightEntity):
 
         self._unique_id = f"light_{DOMAIN}_{hub.identifier}-{device.device_id}"
 
+        self._attr_name = self._name
+        self._attr_unique_id = self._unique_id
+        self._attr_should_poll = False
+        self._attr_device_info = {
+            "identifiers": {(DOMAIN, self._unique_id)},
+            "name": self._name,
+            "manufacturer": "Eaton",
+            "model": "XXX",
+            "sw_version": "Unknown",
+            "via_device": hub.hub_id,
+        }
+        if device.dimmable:
+            self._attr_color_mode = ColorMode.BRIGHTNESS
+            self._attr_supported_features = LightEntityFeature.TRANSITION
+        else:
+            self._attr_color_mode = ColorMode.ONOFF
+            self._attr_supported_features = LightEntityFeature(0)
+        self._attr_supported_color_modes = {self._attr_color_mode}
+
     async def async_added_to_hass(self):
         log(f"Added to hass {self._name} ")
         if self._device.state is None:
             log(f"State is null for {self._name}")
         else:
             self._device.state.subscribe(lambda state: self._state_change(state))
+        await super().async_added_to_hass()
 
-    def _state_change(self, state):
+    def _state_change(self, state, restored=False):
         self._state = state
+        self._restored = restored
+        self._update_attributes()
 
         should_update = self._state is not None
 
@@ -84,76 +108,97 @@ class HASSXComfortLight(LightEntity):
         if should_update:
             self.schedule_update_ha_state()
 
-    @property
-    def device_info(self):
-        return {
-            "identifiers": {(DOMAIN, self.unique_id)},
-            "name": self.name,
-            "manufacturer": "Eaton",
-            "model": "XXX",
-            "sw_version": "Unknown",
-            "via_device": self.hub.hub_id,
-        }
+    def _update_attributes(self):
+        """Recomputes the state attributes, call after every change of _state."""
+        self._attr_extra_state_attributes = self._restored_attributes
 
-    @property
-    def name(self):
-        """Return the display name of this light."""
-        return self._name
-
-    @property
-    def unique_id(self):
-        """Return the unique ID."""
-        return self._unique_id
-
-    @property
-    def should_poll(self) -> bool:
-        return False
-
-    @property
-    def brightness(self):
-        """Return the brightness of the light.
-
-        This method is optional. Removing it indicates to Home Assistant
-        that brightness is not supported for this light.
-        """
-        return int(255.0 * self._state.dimmvalue / 99.0)
-
-    @property
-    def is_on(self):
-        """Return true if light is on."""
-        return self._state.switch
-
-    @property
-    def supported_features(self):
-        """Flag supported features."""
-        if self._device.dimmable:
-            return SUPPORT_BRIGHTNESS
-        return 0
+        if self._state is None:
+            self._attr_is_on = None
+            self._attr_brightness = None
+            return
+
+        self._attr_is_on = self._state.switch
+        self._attr_brightness = int(255.0 * self._state.dimmvalue / 99.0)
+
+    def _current_dimmvalue(self) -> int:
+        """Dimm value the light has right now, 0 when it is off."""
+        if self._state is None or not self._state.switch:
+            return 0
+        return self._state.dimmvalue
 
     async def async_turn_on(self, **kwargs):
         log(f"async_turn_on {self._name} : {kwargs}")
+        self.hub.fades.cancel(self._device)
+        dimmvalue_before_off, self._dimmvalue_before_off = self._dimmvalue_before_off, None
+
+        if kwargs.get(ATTR_TRANSITION) and self._device.dimmable and self._state is not None:
+            if ATTR_BRIGHTNESS in kwargs:
+                br = ceil(kwargs[ATTR_BRIGHTNESS] * 99 / 255.0)
+            else:
+                br = dimmvalue_before_off or self._state.dimmvalue
+            self.hub.fades.start(
+                self._device, self._current_dimmvalue(), br, kwargs[ATTR_TRANSITION]
+            )
+            self._state.switch = True
+            self._state.dimmvalue = br
+            self._update_attributes()
+            self.schedule_update_ha_state()
+            return
+
         if ATTR_BRIGHTNESS in kwargs and self._device.dimmable:
             br = ceil(kwargs[ATTR_BRIGHTNESS] * 99 / 255.0)
             log(f"async_turn_on br {self._name} : {br}")
-            await self._device.dimm(br)
+            with command_priority(self._context):
+                await self._device.dimm(br)
             self._state.dimmvalue = br
+            self._update_attributes()
+            self.schedule_update_ha_state()
+            return
+
+        if dimmvalue_before_off and self._device.dimmable and self._state is not None:
+            # Faded off, the actuator would come back at the minimum brightness.
+            with command_priority(self._context):
+                await self._device.dimm(dimmvalue_before_off)
+            self._state.switch = True
+            self._state.dimmvalue = dimmvalue_before_off
+            self._update_attributes()
             self.schedule_update_ha_state()
             return
 
         switch_task = self._device.switch(True)
         # switch_task = self.hub.bridge.switch_device(self.device_id,True)
-        await switch_task
+        with command_priority(self._context):
+            await switch_task
 
         self._state.switch = True
+        self._update_attributes()
         self.schedule_update_ha_state()
 
     async def async_turn_off(self, **kwargs):
         log(f"async_turn_off {self._name} : {kwargs}")
+        self.hub.fades.cancel(self._device)
+
+        if kwargs.get(ATTR_TRANSITION) and self._device.dimmable and self._current_dimmvalue():
+            self._dimmvalue_before_off = self._current_dimmvalue()
+            self.hub.fades.start(
+                self._device,
+                self._current_dimmvalue(),
+                0,
+                kwargs[ATTR_TRANSITION],
+                turn_off=True,
+            )
+            self._state.switch = False
+            self._update_attributes()
+            self.schedule_update_ha_state()
+            return
+
         switch_task = self._device.switch(False)
         # switch_task = self.hub.bridge.switch_device(self.device_id,True)
-        await switch_task
+        with command_priority(self._context):
+            await switch_task
 
         self._state.switch = False
+        self._update_attributes()
         self.schedule_update_ha_state()
 
     def update(self):
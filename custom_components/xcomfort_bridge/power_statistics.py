@@ -0,0 +1,307 @@
+"""Room power statistics computed in memory and imported into the recorder.
+
+Instead of letting the recorder compile statistics from every state of the
+power and energy sensors, the hub samples room power itself. The held power
+is integrated over time into 5-minute periods, which are combined into
+hourly mean, min, max and energy sum rows and imported once per hour.
+
+On shutdown or reload the hour in progress is imported as well and kept in
+storage. When sampling resumes within the same hour it is merged back, so
+the row imported at the end of the hour covers all of it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Callable
+
+from xcomfort.bridge import Room
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+    get_last_statistics,
+)
+from homeassistant.const import UnitOfEnergy, UnitOfPower
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util, slugify
+
+from .const import DOMAIN, STATISTICS_PERIOD
+
+_LOGGER = logging.getLogger(__name__)
+
+HOUR = 3600
+STORAGE_VERSION = 1
+
+
+class PowerPeriod:
+    """Time weighted power over one period, energy in watt seconds."""
+
+    def __init__(self, start: float):
+        self.start = start
+        self.energy = 0.0
+        self.seconds = 0.0
+        self.min: float | None = None
+        self.max: float | None = None
+
+    def add(self, power: float, seconds: float):
+        self.energy += power * seconds
+        self.seconds += seconds
+        self.min = power if self.min is None else min(self.min, power)
+        self.max = power if self.max is None else max(self.max, power)
+
+    def merge(self, other: PowerPeriod):
+        if not other.seconds:
+            return
+        self.energy += other.energy
+        self.seconds += other.seconds
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def as_dict(self) -> dict:
+        return {
+            "start": self.start,
+            "energy": self.energy,
+            "seconds": self.seconds,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> PowerPeriod:
+        period = cls(data["start"])
+        period.energy = data["energy"]
+        period.seconds = data["seconds"]
+        period.min = data["min"]
+        period.max = data["max"]
+        return period
+
+    @property
+    def mean(self) -> float | None:
+        return self.energy / self.seconds if self.seconds else None
+
+    @property
+    def kwh(self) -> float:
+        return self.energy / 3_600_000
+
+
+class RoomPowerSampler:
+    """Integrates the power of one room into 5-minute periods."""
+
+    def __init__(self, room: Room):
+        self.room = room
+        self.power: float | None = None
+        self.updated: float | None = None
+        self.current: PowerPeriod | None = None
+        self.closed: list[PowerPeriod] = []
+        # Closed periods the listeners have not been told about yet.
+        self.unreported: list[PowerPeriod] = []
+
+    def sample(self, power: float | None, now: float):
+        self.advance(now)
+        self.power = power
+
+    def advance(self, now: float):
+        """Accounts the held power up to now, closing the periods that ended."""
+        if self.updated is None:
+            self.updated = now
+            return
+
+        moment = self.updated
+        while moment < now:
+            start = moment - moment % STATISTICS_PERIOD
+            end = min(now, start + STATISTICS_PERIOD)
+            if self.current is None or self.current.start != start:
+                self._close()
+                self.current = PowerPeriod(start)
+            if self.power is not None:
+                self.current.add(self.power, end - moment)
+            moment = end
+
+        self.updated = now
+
+    def _close(self) -> PowerPeriod | None:
+        period, self.current = self.current, None
+        if period is None or not period.seconds:
+            return None
+        self.closed.append(period)
+        self.unreported.append(period)
+        return period
+
+    def pop_hours(self, now: float, partial: bool = False) -> list[PowerPeriod]:
+        """Combines the closed periods of every complete hour.
+
+        With `partial`, the hour in progress is included as well.
+        """
+        if partial:
+            self._close()
+
+        hours: dict[float, PowerPeriod] = {}
+        remaining = []
+        for period in self.closed:
+            start = period.start - period.start % HOUR
+            if partial or start + HOUR <= now:
+                hours.setdefault(start, PowerPeriod(start)).merge(period)
+            else:
+                remaining.append(period)
+
+        self.closed = remaining
+        return [hours[start] for start in sorted(hours)]
+
+
+class PowerStatistics:
+    """Samples room power and imports hourly statistics in batches."""
+
+    def __init__(self, hass: HomeAssistant, identifier: str, rooms: list[Room]):
+        self.hass = hass
+        self._prefix = slugify(identifier)
+        self._store = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{self._prefix}.power_statistics"
+        )
+        self._samplers = {room.room_id: RoomPowerSampler(room) for room in rooms}
+        self._sums: dict[int, float] = {}
+        self._listeners: dict[int, list[Callable[[PowerPeriod], None]]] = {}
+        self._subscriptions = []
+        self._task: asyncio.Task | None = None
+
+    def statistic_id(self, room: Room, kind: str) -> str:
+        return f"{DOMAIN}:{self._prefix}_room_{room.room_id}_{kind}"
+
+    async def async_start(self):
+        """Continues the energy sums from the recorder and starts sampling."""
+        # The hour flushed by a previous instance, e.g. before a reload, may still be queued.
+        await get_instance(self.hass).async_block_till_done()
+        for sampler in self._samplers.values():
+            self._sums[sampler.room.room_id] = await self._async_last_sum(sampler.room)
+
+        now = time.time()
+        partial = await self._store.async_load() or {}
+        for sampler in self._samplers.values():
+            data = partial.get(str(sampler.room.room_id))
+            if data is not None and data["start"] == now - now % HOUR:
+                # Imported already, it is imported again merged with the rest of the hour.
+                period = PowerPeriod.from_dict(data)
+                sampler.closed.append(period)
+                self._sums[sampler.room.room_id] -= period.kwh
+
+        for sampler in self._samplers.values():
+            sampler.updated = now
+            self._subscriptions.append(
+                sampler.room.state.subscribe(
+                    lambda state, sampler=sampler: sampler.sample(
+                        state.power if state is not None else None, time.time()
+                    )
+                )
+            )
+
+        self._task = asyncio.create_task(self._run())
+        _LOGGER.info(f"Sampling power statistics for {len(self._samplers)} rooms")
+
+    async def async_stop(self):
+        if self._task is not None:
+            self._task.cancel()
+        for subscription in self._subscriptions:
+            subscription.dispose()
+        self._subscriptions.clear()
+        await self._store.async_save(self._flush())
+
+    @callback
+    def async_flush(self):
+        """Imports everything sampled so far, including the hour in progress."""
+        partial = self._flush()
+        # Written at the latest when Home Assistant finishes stopping.
+        self._store.async_delay_save(lambda: partial, 0)
+
+    def _flush(self) -> dict:
+        """Imports everything sampled so far, returns the hour in progress by room."""
+        now = time.time()
+        partial = {}
+        for sampler in self._samplers.values():
+            sampler.advance(now)
+            hours = sampler.pop_hours(now, partial=True)
+            self._import(sampler.room, hours)
+            if hours and hours[-1].start + HOUR > now:
+                partial[str(sampler.room.room_id)] = hours[-1].as_dict()
+        return partial
+
+    @callback
+    def async_add_listener(
+        self, room: Room, listener: Callable[[PowerPeriod], None]
+    ) -> Callable[[], None]:
+        """Calls `listener` with every 5-minute period closed for a room."""
+        listeners = self._listeners.setdefault(room.room_id, [])
+        listeners.append(listener)
+        return lambda: listeners.remove(listener)
+
+    async def _async_last_sum(self, room: Room) -> float:
+        statistic_id = self.statistic_id(room, "energy")
+        last = await get_instance(self.hass).async_add_executor_job(
+            get_last_statistics, self.hass, 1, statistic_id, False, {"sum"}
+        )
+        rows = last.get(statistic_id)
+        if rows and rows[0].get("sum") is not None:
+            return rows[0]["sum"]
+        return 0.0
+
+    async def _run(self):
+        while True:
+            # Wake up just after every period boundary.
+            await asyncio.sleep(STATISTICS_PERIOD - time.time() % STATISTICS_PERIOD + 1)
+
+            now = time.time()
+            for sampler in self._samplers.values():
+                # Room updates close periods as well, report all of them here.
+                sampler.advance(now)
+                closed, sampler.unreported = sampler.unreported, []
+                for period in closed:
+                    for listener in list(self._listeners.get(sampler.room.room_id, ())):
+                        listener(period)
+                self._import(sampler.room, sampler.pop_hours(now))
+
+    def _import(self, room: Room, hours: list[PowerPeriod]):
+        power_rows: list[StatisticData] = []
+        energy_rows: list[StatisticData] = []
+        total = self._sums.get(room.room_id, 0.0)
+        for hour in hours:
+            if not hour.seconds:
+                continue
+            total += hour.kwh
+            start = dt_util.utc_from_timestamp(hour.start)
+            power_rows.append(
+                StatisticData(start=start, mean=hour.mean, min=hour.min, max=hour.max)
+            )
+            energy_rows.append(StatisticData(start=start, state=total, sum=total))
+
+        if not power_rows:
+            return
+        self._sums[room.room_id] = total
+
+        async_add_external_statistics(
+            self.hass,
+            StatisticMetaData(
+                has_mean=True,
+                has_sum=False,
+                name=f"{room.name} power",
+                source=DOMAIN,
+                statistic_id=self.statistic_id(room, "power"),
+                unit_of_measurement=UnitOfPower.WATT,
+            ),
+            power_rows,
+        )
+        async_add_external_statistics(
+            self.hass,
+            StatisticMetaData(
+                has_mean=False,
+                has_sum=True,
+                name=f"{room.name} energy",
+                source=DOMAIN,
+                statistic_id=self.statistic_id(room, "energy"),
+                unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+            ),
+            energy_rows,
+        )
+        _LOGGER.debug(f"Imported {len(power_rows)} hours of statistics for {room.name}")
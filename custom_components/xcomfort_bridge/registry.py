@@ -0,0 +1,41 @@
+"""Maps xComfort devices and rooms to the platforms that represent them."""
+
+from __future__ import annotations
+
+from xcomfort.bridge import Room
+from xcomfort.devices import BridgeDevice, Light, RcTouch, Shade
+from xcomfort.room import RoomState
+
+from homeassistant.const import Platform
+
+# New device types only need an entry here, subclasses match their base class.
+DEVICE_PLATFORMS: dict[type, tuple[Platform, ...]] = {
+    Light: (Platform.LIGHT,),
+    Shade: (Platform.COVER,),
+    RcTouch: (Platform.SENSOR,),
+}
+
+
+def device_platforms(device: BridgeDevice) -> tuple[Platform, ...]:
+    """Platforms that create entities for a device."""
+    for cls in type(device).__mro__:
+        if cls in DEVICE_PLATFORMS:
+            return DEVICE_PLATFORMS[cls]
+    return ()
+
+
+def room_platforms(room: Room, state: RoomState | None = None) -> tuple[Platform, ...]:
+    """Platforms that create entities for a room, based on its state.
+
+    `state` stands in for the room's own state while it has none.
+    """
+    state = room.state.value or state
+    if state is None:
+        return ()
+
+    platforms = []
+    if state.setpoint is not None:
+        platforms.append(Platform.CLIMATE)
+    if state.power is not None:
+        platforms.append(Platform.SENSOR)
+    return tuple(platforms)
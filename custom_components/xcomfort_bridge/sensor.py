@@ -21,6 +21,7 @@ from xcomfort.devices import RcTouch
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
     PERCENTAGE,
+    Platform,
     UnitOfTemperature,
     UnitOfPower,
     UnitOfEnergy,
@@ -28,7 +29,9 @@ from homeassistant.const import (
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
+from .entity import XComfortDeviceEntity, XComfortEntity, XComfortRoomEntity
 from .hub import XComfortHub
+from .power_statistics import PowerPeriod
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -38,90 +41,126 @@ async def async_setup_entry(
 ) -> None:
     hub = XComfortHub.get_hub(hass, entry)
 
-    rooms = hub.rooms
-    devices = hub.devices
-
-    _LOGGER.info(f"Found {len(rooms)} xcomfort rooms")
-    _LOGGER.info(f"Found {len(devices)} xcomfort devices")
-
     sensors = list()
-    for room in rooms:
-        if room.state.value is not None:
-            if room.state.value.power is not None:
-                _LOGGER.info(f"Adding energy and power sensors for room {room.name}")
-                sensors.append(XComfortPowerSensor(room))
-                sensors.append(XComfortEnergySensor(room))
-
-    for device in devices:
+    for room in hub.rooms_for(Platform.SENSOR):
+        _LOGGER.info(f"Adding energy and power sensors for room {room.name}")
+        sensors.append(XComfortPowerSensor(hub, room))
+        sensors.append(XComfortEnergySensor(hub, room))
+
+    for device in hub.devices_for(Platform.SENSOR):
         if isinstance(device, RcTouch):
             _LOGGER.info(f"Adding humidity sensor for device {device}")
-            sensors.append(XComfortHumiditySensor(device))
+            sensors.append(XComfortHumiditySensor(hub, device))
 
             _LOGGER.info(f"Adding temperature sensor for room {device}")
-            sensors.append(XComfortTemperatureSensor(device))
+            sensors.append(XComfortTemperatureSensor(hub, device))
 
     _LOGGER.info(f"Added {len(sensors)} rc touch units")
     async_add_entities(sensors)
     return
 
 
-class XComfortPowerSensor(SensorEntity):
-    def __init__(self, room: Room):
+class XComfortPowerSensor(XComfortRoomEntity, SensorEntity):
+    def __init__(self, hub: XComfortHub, room: Room):
         self.entity_description = SensorEntityDescription(
             key="current_consumption",
             device_class=SensorDeviceClass.POWER,
             native_unit_of_measurement=UnitOfPower.WATT,
-            state_class=SensorStateClass.MEASUREMENT,
+            # With direct statistics import the recorder must not compile them again.
+            state_class=None if hub.power_statistics else SensorStateClass.MEASUREMENT,
             name="Current consumption",
         )
+        self.hub = hub
         self._room = room
         self._attr_name = self._room.name
         self._attr_unique_id = f"energy_{self._room.room_id}"
         self._state = None
         self._room.state.subscribe(lambda state: self._state_change(state))
 
-    def _state_change(self, state):
+    async def async_added_to_hass(self) -> None:
+        """Call when entity about to be added to hass."""
+        await super().async_added_to_hass()
+        if self.hub.power_statistics is not None:
+            self.async_on_remove(
+                self.hub.power_statistics.async_add_listener(self._room, self._period_closed)
+            )
+
+    def _state_change(self, state, restored=False):
         should_update = self._state is not None
 
         self._state = state
-        if should_update:
+        self._restored = restored
+        self._update_attributes()
+        if should_update and self.hub.power_statistics is None:
             self.async_write_ha_state()
 
-    @property
-    def native_value(self):
-        return self._state and self._state.power
+    def _update_attributes(self):
+        if self.hub.power_statistics is not None:
+            # The value and attributes are the last period's, set in _period_closed.
+            return
+        self._attr_extra_state_attributes = self._restored_attributes
+        self._attr_native_value = self._state and self._state.power
 
+    def _period_closed(self, period: PowerPeriod):
+        """Publishes the mean power of the last statistics period."""
+        self._restored = False
+        self._attr_native_value = round(period.mean, 1)
+        self._attr_extra_state_attributes = {"min": period.min, "max": period.max}
+        self.async_write_ha_state()
 
-class XComfortEnergySensor(RestoreSensor):
-    def __init__(self, room: Room):
+
+class XComfortEnergySensor(XComfortEntity, RestoreSensor):
+    def __init__(self, hub: XComfortHub, room: Room):
         self.entity_description = SensorEntityDescription(
             key="energy_used",
             device_class=SensorDeviceClass.ENERGY,
             native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
-            state_class=SensorStateClass.TOTAL_INCREASING,
+            state_class=None if hub.power_statistics else SensorStateClass.TOTAL_INCREASING,
             name="Energy consumption",
         )
+        self.hub = hub
         self._room = room
         self._attr_name = self._room.name
         self._attr_unique_id = f"energy_kwh_{self._room.room_id}"
         self._state = None
-        self._room.state.subscribe(lambda state: self._state_change(state))
         self._updateTime = time.time()
         self._consumption = 0
+        self._room.state.subscribe(lambda state: self._state_change(state))
 
     async def async_added_to_hass(self) -> None:
         """Call when entity about to be added to hass."""
         await super().async_added_to_hass()
+        if self.hub.power_statistics is not None:
+            self.async_on_remove(
+                self.hub.power_statistics.async_add_listener(self._room, self._period_closed)
+            )
         savedstate = await self.async_get_last_sensor_data()
         if savedstate:
             self._consumption = cast(float, savedstate.native_value)
+            self._update_attributes()
 
     def _state_change(self, state):
         should_update = self._state is not None
+        if self._state and self._state.power is not None:
+            # The previous power was drawn until now.
+            self.calculate(self._state.power)
         self._state = state
-        if should_update:
+        self._update_attributes()
+        if should_update and self.hub.power_statistics is None:
             self.async_write_ha_state()
 
+    def _update_attributes(self):
+        if self._state and self._state.power is not None:
+            self._attr_native_value = self._consumption
+        else:
+            self._attr_native_value = None
+
+    def _period_closed(self, period: PowerPeriod):
+        if self._state and self._state.power is not None:
+            self.calculate(self._state.power)
+            self._update_attributes()
+        self.async_write_ha_state()
+
     def calculate(self, power):
         timediff = math.floor(
             time.time() - self._updateTime
@@ -131,16 +170,9 @@ class XComfortEnergySensor(RestoreSensor):
         )  # Calculate, in kWh, energy consumption since last update.
         self._updateTime = time.time()
 
-    @property
-    def native_value(self):
-        if self._state and self._state.power is not None:
-            self.calculate(self._state.power)
-            return self._consumption
-        return None
-
 
-class XComfortHumiditySensor(SensorEntity):
-    def __init__(self, device: RcTouch):
+class XComfortHumiditySensor(XComfortDeviceEntity, SensorEntity):
+    def __init__(self, hub: XComfortHub, device: RcTouch):
         self.entity_description = SensorEntityDescription(
             key="humidity",
             device_class=SensorDeviceClass.HUMIDITY,
@@ -148,26 +180,29 @@ class XComfortHumiditySensor(SensorEntity):
             state_class=SensorStateClass.MEASUREMENT,
             name="Humidity",
         )
+        self.hub = hub
         self._device = device
         self._attr_name = self._device.name
         self._attr_unique_id = f"humidity_{self._device.name}_{self._device.device_id}"
         self._state = None
         self._device.state.subscribe(lambda state: self._state_change(state))
 
-    def _state_change(self, state):
+    def _state_change(self, state, restored=False):
         should_update = self._state is not None
 
         self._state = state
+        self._restored = restored
+        self._update_attributes()
         if should_update:
             self.async_write_ha_state()
 
-    @property
-    def native_value(self):
-        return self._state and self._state.humidity
+    def _update_attributes(self):
+        self._attr_extra_state_attributes = self._restored_attributes
+        self._attr_native_value = self._state and self._state.humidity
 
 
-class XComfortTemperatureSensor(SensorEntity):
-    def __init__(self, device: RcTouch):
+class XComfortTemperatureSensor(XComfortDeviceEntity, SensorEntity):
+    def __init__(self, hub: XComfortHub, device: RcTouch):
         self.entity_description = SensorEntityDescription(
             key="temperature",
             device_class=SensorDeviceClass.TEMPERATURE,
@@ -175,19 +210,22 @@ class XComfortTemperatureSensor(SensorEntity):
             state_class=SensorStateClass.MEASUREMENT,
             name="Temperature",
         )
+        self.hub = hub
         self._device = device
         self._attr_name = self._device.name
         self._attr_unique_id = f"temperature_{self._device.name}_{self._device.device_id}"
         self._state = None
         self._device.state.subscribe(lambda state: self._state_change(state))
 
-    def _state_change(self, state):
+    def _state_change(self, state, restored=False):
         should_update = self._state is not None
 
         self._state = state
+        self._restored = restored
+        self._update_attributes()
         if should_update:
             self.async_write_ha_state()
 
-    @property
-    def native_value(self):
-        return self._state and self._state.temperature
+    def _update_attributes(self):
+        self._attr_extra_state_attributes = self._restored_attributes
+        self._attr_native_value = self._state and self._state.temperature
@@ -0,0 +1,133 @@
+"""Services for the Eaton xComfort Bridge integration."""
+
+from __future__ import annotations
+
+import logging
+import time
+
+import voluptuous as vol
+from xcomfort.room import RctMode
+
+from homeassistant.core import HomeAssistant, ServiceCall, SupportsResponse
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+
+from .climate import HASSXComfortRcTouch, async_apply_heating_profile
+from .const import (
+    ATTR_MODE,
+    ATTR_PATH,
+    ATTR_ROOMS,
+    ATTR_SETPOINT,
+    ATTR_SPEED,
+    DOMAIN,
+    SERVICE_APPLY_HEATING_PROFILE,
+    SERVICE_REPLAY_RECORDING,
+    SERVICE_START_RECORDING,
+    SERVICE_STOP_RECORDING,
+)
+from .traffic import TrafficReplayer
+
+_LOGGER = logging.getLogger(__name__)
+
+START_RECORDING_SCHEMA = vol.Schema({vol.Optional(ATTR_PATH): cv.string})
+REPLAY_RECORDING_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_PATH): cv.string,
+        vol.Optional(ATTR_SPEED, default=1.0): vol.All(
+            vol.Coerce(float), vol.Range(min=0)
+        ),
+    }
+)
+
+MODES = {mode.name.lower(): mode for mode in RctMode}
+ROOM_PROFILE_SCHEMA = vol.All(
+    {
+        vol.Optional(ATTR_MODE): vol.All(vol.Lower, vol.In(MODES)),
+        vol.Optional(ATTR_SETPOINT): vol.Coerce(float),
+    },
+    cv.has_at_least_one_key(ATTR_MODE, ATTR_SETPOINT),
+)
+APPLY_HEATING_PROFILE_SCHEMA = vol.Schema(
+    {vol.Required(ATTR_ROOMS): {cv.string: ROOM_PROFILE_SCHEMA}}
+)
+
+
+def async_setup_services(hass: HomeAssistant):
+    """Registers the integration services."""
+
+    async def start_recording(call: ServiceCall):
+        for hub in hass.data[DOMAIN].values():
+            filename = call.data.get(ATTR_PATH) or (
+                f"xcomfort_{hub.identifier}_{int(time.time())}.jsonl.gz"
+            )
+            await hub.start_recording(hass.config.path(filename))
+
+    async def stop_recording(call: ServiceCall):
+        for hub in hass.data[DOMAIN].values():
+            await hub.stop_recording()
+
+    async def replay_recording(call: ServiceCall):
+        reports = {}
+        for hub in hass.data[DOMAIN].values():
+            replayer = TrafficReplayer(
+                hass,
+                hub,
+                hass.config.path(call.data[ATTR_PATH]),
+                call.data[ATTR_SPEED],
+            )
+            reports[hub.identifier] = await replayer.async_run()
+        return reports
+
+    async def apply_heating_profile(call: ServiceCall):
+        # Rooms are given by climate entity id or by room name.
+        rooms = {
+            key.casefold(): profile for key, profile in call.data[ATTR_ROOMS].items()
+        }
+
+        # Every room is resolved before anything is sent, a typo must not apply half a profile.
+        profiles = []
+        for hub in hass.data[DOMAIN].values():
+            profile = {}
+            for entity in hub.entities:
+                if not isinstance(entity, HASSXComfortRcTouch):
+                    continue
+                room = rooms.pop(entity.entity_id, None) or rooms.pop(
+                    entity.name.casefold(), None
+                )
+                if room is not None:
+                    mode = room.get(ATTR_MODE)
+                    profile[entity] = (
+                        MODES[mode] if mode else None,
+                        room.get(ATTR_SETPOINT),
+                    )
+            if profile:
+                profiles.append((hub, profile))
+
+        if rooms:
+            raise HomeAssistantError(f"Unknown rooms: {', '.join(rooms)}")
+
+        applied = {}
+        for hub, profile in profiles:
+            applied.update(
+                await async_apply_heating_profile(hub, profile, call.context)
+            )
+        return applied
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_START_RECORDING, start_recording, START_RECORDING_SCHEMA
+    )
+    hass.services.async_register(DOMAIN, SERVICE_STOP_RECORDING, stop_recording)
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_REPLAY_RECORDING,
+        replay_recording,
+        REPLAY_RECORDING_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_APPLY_HEATING_PROFILE,
+        apply_heating_profile,
+        APPLY_HEATING_PROFILE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
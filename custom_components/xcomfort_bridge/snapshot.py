@@ -0,0 +1,134 @@
+"""Persisted snapshot of the last known device and room states."""
+
+from __future__ import annotations
+
+import logging
+
+from xcomfort.bridge import Room
+from xcomfort.devices import (
+    BridgeDevice,
+    Light,
+    LightState,
+    RcTouch,
+    RcTouchState,
+    Shade,
+    ShadeState,
+)
+from xcomfort.room import RctMode, RctState, RoomState
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+
+def _encode_device(state) -> dict | None:
+    if isinstance(state, LightState):
+        return {"switch": state.switch, "dimmvalue": state.dimmvalue}
+    if isinstance(state, RcTouchState):
+        return {"temperature": state.temperature, "humidity": state.humidity}
+    if isinstance(state, ShadeState):
+        return {"position": state.position, "current_state": state.current_state}
+    return None
+
+
+def _encode_room(state: RoomState) -> dict:
+    return {
+        "setpoint": state.setpoint,
+        "temperature": state.temperature,
+        "humidity": state.humidity,
+        "power": state.power,
+        "mode": state.mode.value if state.mode is not None else None,
+        "state": state.rctstate.value if state.rctstate is not None else None,
+    }
+
+
+class StateSnapshot:
+    """Keeps the latest state of every device and room across restarts.
+
+    Restored states are only used to seed entities whose device or room
+    has not reported a state yet, the bridge always has the last word.
+    The payloads the devices and rooms were created from are kept as well,
+    so entities can be set up before the bridge sends its data.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str):
+        self._store = Store(hass, SNAPSHOT_VERSION, f"{DOMAIN}.{entry_id}.snapshot")
+        self._devices: dict[str, dict] = {}
+        self._rooms: dict[str, dict] = {}
+        self.topology: dict = {}
+
+    async def async_load(self):
+        data = await self._store.async_load()
+        if data:
+            self._devices = data.get("devices", {})
+            self._rooms = data.get("rooms", {})
+            self.topology = data.get("topology", {})
+        _LOGGER.info(
+            f"Loaded snapshot with {len(self._devices)} devices and {len(self._rooms)} rooms"
+        )
+
+    async def async_save(self, devices, rooms, topology: dict):
+        """Merges the current states into the snapshot and writes it."""
+        for device in devices:
+            if device.state.value is not None:
+                encoded = _encode_device(device.state.value)
+                if encoded is not None:
+                    self._devices[str(device.device_id)] = encoded
+
+        for room in rooms:
+            if room.state.value is not None:
+                self._rooms[str(room.room_id)] = _encode_room(room.state.value)
+
+        if topology.get("devices") or topology.get("rooms"):
+            self.topology = topology
+
+        await self._store.async_save(
+            {"devices": self._devices, "rooms": self._rooms, "topology": self.topology}
+        )
+
+    def device_state(self, device: BridgeDevice):
+        """Restored state object for a device, or None."""
+        data = self._devices.get(str(device.device_id))
+        if data is None:
+            return None
+
+        try:
+            if isinstance(device, Light):
+                return LightState(data["switch"], data["dimmvalue"], {})
+            if isinstance(device, RcTouch):
+                return RcTouchState(data["temperature"], data["humidity"], {})
+            if isinstance(device, Shade):
+                state = ShadeState()
+                state.update_from_partial_state_update(
+                    {"shPos": data["position"], "curstate": data["current_state"]}
+                )
+                return state
+        except KeyError:
+            _LOGGER.warning(
+                f"Ignoring malformed snapshot for device {device.device_id}"
+            )
+        return None
+
+    def room_state(self, room: Room) -> RoomState | None:
+        """Restored state object for a room, or None."""
+        data = self._rooms.get(str(room.room_id))
+        if data is None:
+            return None
+
+        mode = RctMode(data["mode"]) if data.get("mode") is not None else None
+        rctstate = RctState(data["state"]) if data.get("state") is not None else None
+        raw = {"mode": data["mode"]} if mode is not None else {}
+        return RoomState(
+            data.get("setpoint"),
+            data.get("temperature"),
+            data.get("humidity"),
+            data.get("power"),
+            mode,
+            rctstate,
+            raw,
+        )
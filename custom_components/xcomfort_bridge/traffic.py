@@ -0,0 +1,223 @@
+"""Recording and replay of decoded xComfort bridge traffic.
+
+Recordings are gzip compressed JSON lines. The first line is a header object,
+every following line is a ``[time, direction, type_int, payload]`` list where
+``time`` is the monotonic offset in seconds from the start of the recording.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from base64 import b64encode
+import gzip
+import json
+import logging
+import time
+
+from Crypto.Cipher import AES
+from Crypto.Random import get_random_bytes
+from xcomfort.connection import _pad_string
+from xcomfort.messages import Messages
+
+from homeassistant.core import HomeAssistant
+
+from .connection import XComfortConnection
+from .devices import Rocker
+
+_LOGGER = logging.getLogger(__name__)
+
+RECORDING_VERSION = 1
+DIRECTION_IN = "in"
+DIRECTION_OUT = "out"
+
+# Number of buffered messages that triggers a write to disk.
+FLUSH_SIZE = 200
+
+
+def _encode(entry) -> str:
+    return json.dumps(entry, separators=(",", ":")) + "\n"
+
+
+def _encrypt(key: bytes, iv: bytes, message: dict) -> str:
+    """Encrypts a message the way the bridge sends it."""
+    data = _pad_string(json.dumps(message).encode())
+    return b64encode(AES.new(key, AES.MODE_CBC, iv).encrypt(data)).decode() + "\u0004"
+
+
+def _message_name(message_type: int) -> str:
+    try:
+        return Messages(message_type).name
+    except ValueError:
+        return str(message_type)
+
+
+class TrafficRecorder:
+    """Buffers bridge messages and appends them to a recording file."""
+
+    def __init__(self, hass: HomeAssistant, path: str, identifier: str):
+        self.hass = hass
+        self.path = path
+        self.count = 0
+        self._start = time.monotonic()
+        self._lines = [
+            _encode(
+                {
+                    "version": RECORDING_VERSION,
+                    "identifier": identifier,
+                    "started": time.time(),
+                }
+            )
+        ]
+        self._lock = asyncio.Lock()
+        self._flush_pending = False
+        self._mode = "wt"
+
+    def record_inbound(self, message_type: int, payload: dict):
+        self._record(DIRECTION_IN, message_type, payload)
+
+    def record_outbound(self, message_type: int, payload: dict):
+        self._record(DIRECTION_OUT, message_type, payload)
+
+    def _record(self, direction: str, message_type: int, payload: dict):
+        # Payloads are encoded right away, the library mutates some of them later.
+        offset = round(time.monotonic() - self._start, 4)
+        self._lines.append(_encode([offset, direction, int(message_type), payload]))
+        self.count += 1
+
+        # One flush at a time, it takes whatever was buffered when it starts writing.
+        if len(self._lines) >= FLUSH_SIZE and not self._flush_pending:
+            self._flush_pending = True
+            self.hass.async_create_task(self._async_flush())
+
+    async def _async_flush(self):
+        async with self._lock:
+            self._flush_pending = False
+            lines, self._lines = self._lines, []
+            if lines:
+                await self.hass.async_add_executor_job(self._write, lines)
+
+    def _write(self, lines: list[str]):
+        # Each flush appends a new gzip member, which gzip.open reads back as one stream.
+        with gzip.open(self.path, self._mode, encoding="utf-8") as file:
+            file.writelines(lines)
+        self._mode = "at"
+
+    async def async_close(self):
+        await self._async_flush()
+
+
+def load_recording(path: str) -> tuple[dict, list]:
+    """Reads a recording file, returns its header and entries."""
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        header = json.loads(file.readline())
+        if header.get("version") != RECORDING_VERSION:
+            raise ValueError(f"Unsupported recording version in {path}")
+        entries = [json.loads(line) for line in file if line.strip()]
+    return header, entries
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(fraction * (len(values) - 1))))
+    return values[index]
+
+
+class TrafficReplayer:
+    """Feeds the inbound messages of a recording into a replay copy of a hub.
+
+    The copy is never connected and fires no bus events, so the live hub,
+    its entities, its heartbeat and any automations are not affected.
+    Messages are encrypted up front and go through the same decrypt and
+    dispatch path as live frames. Every device or room state the copy
+    produces is counted, that is what an entity would write, and so are
+    messages whose handler failed.
+
+    A speed of 1 replays in real time, higher values replay faster and
+    a speed of 0 replays as fast as the event loop allows.
+    """
+
+    def __init__(self, hass: HomeAssistant, hub, path: str, speed: float = 1.0):
+        self.hass = hass
+        self.hub = hub
+        self.path = path
+        self.speed = speed
+        self._state_updates = 0
+
+    def _state_changed(self, state):
+        if state is not None:
+            self._state_updates += 1
+
+    async def async_run(self) -> dict:
+        """Replays the recording and returns a performance report."""
+        _, entries = await self.hass.async_add_executor_job(load_recording, self.path)
+        inbound = [entry for entry in entries if entry[1] == DIRECTION_IN]
+
+        handle_times = []
+        by_type = {}
+        hub = self.hub.replay_hub()
+        bridge = hub.bridge
+
+        key = get_random_bytes(32)
+        iv = get_random_bytes(16)
+        connection = XComfortConnection(None, key, iv, "replay", hub.handle_frame)
+        frames = [
+            _encrypt(key, iv, {"type_int": message_type, "payload": payload})
+            for _, _, message_type, payload in inbound
+        ]
+
+        # Subscribed like entities are, unsubscribed states are not even built.
+        subscriptions = [
+            target.state.subscribe(self._state_changed)
+            for target in list(hub.devices) + list(hub.rooms)
+            if not isinstance(target, Rocker)
+        ]
+        # Subscribing emits the seeded states, they are not part of the replay.
+        self._state_updates = 0
+        try:
+            start = time.monotonic()
+            for (offset, _, message_type, _), frame in zip(inbound, frames):
+                if self.speed > 0:
+                    delay = start + offset / self.speed - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+
+                began = time.perf_counter()
+                received = time.monotonic()
+                message = connection._decrypt(frame)
+                hub.handle_frame(message, received)
+                bridge._onMessage(message)
+                handle_times.append(time.perf_counter() - began)
+
+                name = _message_name(message_type)
+                by_type[name] = by_type.get(name, 0) + 1
+
+                await asyncio.sleep(0)
+
+            duration = time.monotonic() - start
+        finally:
+            for subscription in subscriptions:
+                subscription.dispose()
+            await bridge.close()
+
+        count = len(handle_times)
+        handle_times.sort()
+        report = {
+            "path": self.path,
+            "speed": self.speed,
+            "messages": count,
+            "duration": round(duration, 3),
+            "throughput": round(count / duration, 1) if duration > 0 else None,
+            "state_updates": self._state_updates,
+            "handler_errors": bridge.handler_errors,
+            "button_presses": hub.event_latency.count,
+            "handle_time_ms": {
+                "mean": round(sum(handle_times) / count * 1000, 4) if count else 0.0,
+                "p50": round(_percentile(handle_times, 0.5) * 1000, 4),
+                "p95": round(_percentile(handle_times, 0.95) * 1000, 4),
+                "max": round(handle_times[-1] * 1000, 4) if count else 0.0,
+            },
+            "by_type": by_type,
+        }
+        _LOGGER.info(f"Replayed {self.path}: {report}")
+        return report
@@ -0,0 +1,135 @@
+"""Software transitions for dimmable xComfort lights."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+
+from xcomfort.devices import Light
+
+from .commands import PRIORITY_BULK, CommandScheduler, set_task_priority
+from .const import FADE_COMMAND_BURST, FADE_COMMAND_RATE, FADE_TICK
+
+_LOGGER = logging.getLogger(__name__)
+
+# Lowest dimm value that keeps a light on, fades to off end here before switching off.
+MIN_DIMMVALUE = 1
+
+
+class Fade:
+    def __init__(
+        self, device: Light, start: int, target: int, duration: float, turn_off: bool
+    ):
+        self.device = device
+        self.start = start
+        self.target = target
+        self.duration = duration
+        self.turn_off = turn_off
+        self.started = time.monotonic()
+        self.last_value = start
+        self.last_sent = self.started
+
+    def value(self, now: float) -> int:
+        """Dimm value the light should have at the given time."""
+        progress = min(1.0, (now - self.started) / self.duration)
+        return round(self.start + (self.target - self.start) * progress)
+
+    def finished(self, now: float) -> bool:
+        return now - self.started >= self.duration
+
+
+class FadeScheduler:
+    """Runs all light fades on one timer within a shared command budget.
+
+    Every tick, fades that are due get a `dimm` command while the budget
+    lasts, the ones that waited the longest first. When many lights fade
+    at once, each of them gets fewer and larger steps instead of the
+    bridge receiving more commands than it can handle.
+    """
+
+    def __init__(
+        self,
+        commands: CommandScheduler,
+        rate: float = FADE_COMMAND_RATE,
+        burst: float = FADE_COMMAND_BURST,
+    ):
+        self._commands = commands
+        self._rate = rate
+        self._burst = burst
+        self._tokens = burst
+        self._fades: dict[int, Fade] = {}
+        self._task: asyncio.Task | None = None
+
+    def start(
+        self,
+        device: Light,
+        start: int,
+        target: int,
+        duration: float,
+        turn_off: bool = False,
+    ):
+        """Starts fading a light, replacing any fade it already runs."""
+        target = max(MIN_DIMMVALUE, min(99, target))
+        self._fades[device.device_id] = Fade(device, start, target, duration, turn_off)
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def cancel(self, device: Light):
+        """Stops the running fade of a light, if any."""
+        self._fades.pop(device.device_id, None)
+        # A step already waiting for the bridge would undo what replaces the fade.
+        self._commands.discard({"deviceId": device.device_id}, PRIORITY_BULK)
+
+    def stop(self):
+        self._fades.clear()
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _run(self):
+        # Fade steps give way to everything else sent to the bridge.
+        set_task_priority(PRIORITY_BULK)
+        last_tick = time.monotonic()
+        while self._fades:
+            await asyncio.sleep(FADE_TICK)
+
+            now = time.monotonic()
+            self._tokens = min(
+                self._burst, self._tokens + (now - last_tick) * self._rate
+            )
+            last_tick = now
+
+            # Final steps go first, so fades end on time even when the budget is tight.
+            due = sorted(
+                self._fades.values(),
+                key=lambda fade: (not fade.finished(now), fade.last_sent),
+            )
+            for fade in due:
+                if self._tokens < 1:
+                    break
+                if self._fades.get(fade.device.device_id) is not fade:
+                    # Cancelled or replaced while an earlier step was being sent.
+                    continue
+
+                value = fade.value(now)
+                finished = fade.finished(now)
+                if value == fade.last_value and not finished:
+                    continue
+
+                self._tokens -= 1
+                fade.last_value = value
+                fade.last_sent = now
+                if finished:
+                    self._fades.pop(fade.device.device_id, None)
+
+                try:
+                    if finished and fade.turn_off:
+                        await fade.device.switch(False)
+                    else:
+                        await fade.device.dimm(value)
+                except Exception as e:
+                    _LOGGER.warning(
+                        f"Fade step for {fade.device.name} failed: {repr(e)}"
+                    )
+                    self._fades.pop(fade.device.device_id, None)
@@ -0,0 +1,155 @@
+"""Microbenchmark of the bridge receive path, library versus integration.
+
+Run from the repository root in the development environment:
+
+    python scripts/benchmark_decode.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+from Crypto.Random import get_random_bytes
+from xcomfort.bridge import Bridge
+from xcomfort.connection import SecureBridgeConnection
+from xcomfort.messages import Messages
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "custom_components"))
+
+from xcomfort_bridge.connection import XComfortConnection  # noqa: E402
+from xcomfort_bridge.hub import XComfortBridge  # noqa: E402
+
+LIGHTS = 60
+COMPS = 40
+ROUNDS = 20000
+
+
+class CapturingWebsocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_str(self, data):
+        self.sent.append(data)
+
+
+class NullHub:
+    def handle_inbound(self, message):
+        pass
+
+    def handle_frame(self, frame, received):
+        pass
+
+
+def topology():
+    return {
+        "devices": [
+            {
+                "deviceId": i,
+                "name": f"Light {i}",
+                "devType": 100,
+                "compId": i,
+                "dimmable": True,
+                "switch": False,
+                "dimmvalue": 0,
+            }
+            for i in range(LIGHTS)
+        ],
+        "comps": [
+            {"compId": 1000 + i, "name": f"Comp {i}", "compType": 86}
+            for i in range(COMPS)
+        ],
+        "lastItem": True,
+    }
+
+
+def messages():
+    """Mix of subscribed light updates, unsubscribed comp updates and unhandled types."""
+    result = []
+    for i in range(LIGHTS):
+        result.append(
+            {
+                "type_int": Messages.SET_STATE_INFO,
+                "mc": i,
+                "payload": {
+                    "item": [{"deviceId": i, "switch": True, "dimmvalue": i % 99}]
+                },
+            }
+        )
+        if i % 3 == 0:
+            result.append(
+                {
+                    "type_int": Messages.SET_STATE_INFO,
+                    "mc": i,
+                    "payload": {
+                        "item": [
+                            {
+                                "compId": 1000 + i % COMPS,
+                                "info": [{"text": "1109", "value": "21.5"}],
+                            }
+                        ]
+                    },
+                }
+            )
+        if i % 5 == 0:
+            result.append(
+                {
+                    "type_int": Messages.SET_BRIDGE_STATE,
+                    "mc": i,
+                    "payload": {"time": 1234567890, "state": 1},
+                }
+            )
+    return result
+
+
+async def encrypt_frames(key, iv):
+    websocket = CapturingWebsocket()
+    connection = SecureBridgeConnection(websocket, key, iv, "bench")
+    for message in messages():
+        await connection.send(message)
+    return websocket.sent
+
+
+def run(frames, decrypt, bridge):
+    start = time.perf_counter()
+    for _ in range(ROUNDS // len(frames) + 1):
+        for frame in frames:
+            bridge._onMessage(decrypt(frame))
+    count = (ROUNDS // len(frames) + 1) * len(frames)
+    return (time.perf_counter() - start) / count
+
+
+async def main():
+    key = get_random_bytes(32)
+    iv = get_random_bytes(16)
+    frames = await encrypt_frames(key, iv)
+
+    library_bridge = Bridge("127.0.0.1", "bench")
+    library_bridge._handle_SET_ALL_DATA(topology())
+    library_connection = SecureBridgeConnection(None, key, iv, "bench")
+
+    bridge = XComfortBridge(NullHub(), "127.0.0.1", "bench")
+    bridge._handle_SET_ALL_DATA(topology())
+    connection = XComfortConnection(None, key, iv, "bench", NullHub().handle_frame)
+
+    # Lights have entities subscribed to them, comps have none.
+    for device in list(library_bridge._devices.values()) + list(
+        bridge._devices.values()
+    ):
+        device.state.subscribe(lambda state: None)
+
+    before = run(
+        frames, library_connection._SecureBridgeConnection__decrypt, library_bridge
+    )
+    after = run(frames, connection._decrypt, bridge)
+
+    print(f"{len(frames)} distinct frames, {ROUNDS} messages per run")
+    print(f"library:     {before * 1e6:8.2f} us/message")
+    print(f"integration: {after * 1e6:8.2f} us/message ({before / after:.2f}x)")
+
+    await library_bridge.close()
+    await bridge.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,101 @@
+"""Microbenchmark of entity state writes for the xComfort entity classes.
+
+Run from the repository root in the development environment:
+
+    python scripts/benchmark_state_write.py
+
+The script measures the working tree only. To compare against an earlier
+revision, run it from a second checkout of that revision:
+
+    git worktree add /tmp/xcomfort-before <revision>
+    python /tmp/xcomfort-before/scripts/benchmark_state_write.py
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+
+from homeassistant.core import HomeAssistant
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "custom_components"))
+
+from xcomfort_bridge.climate import HASSXComfortRcTouch  # noqa: E402
+from xcomfort_bridge.hub import XComfortHub  # noqa: E402
+from xcomfort_bridge.light import HASSXComfortLight  # noqa: E402
+from xcomfort_bridge.sensor import XComfortEnergySensor, XComfortPowerSensor  # noqa: E402
+
+WRITES = 20000
+
+TOPOLOGY = {
+    "devices": [
+        {
+            "deviceId": 1,
+            "name": "Light",
+            "devType": 100,
+            "compId": 1,
+            "dimmable": True,
+            "switch": True,
+            "dimmvalue": 50,
+        },
+    ],
+    "rooms": [
+        {
+            "roomId": 2,
+            "name": "Room",
+            "setpoint": 21.0,
+            "temp": 20.5,
+            "humidity": 40.0,
+            "currentMode": 3,
+            "state": 0,
+            "power": 12.0,
+        },
+    ],
+    "lastItem": True,
+}
+
+
+def run(hass, entity, entity_id):
+    entity.hass = hass
+    entity.entity_id = entity_id
+
+    start = time.perf_counter()
+    for _ in range(WRITES):
+        entity.async_write_ha_state()
+    return (time.perf_counter() - start) / WRITES
+
+
+async def main():
+    # Entities are not added through a platform here, which Home Assistant warns about.
+    logging.getLogger("homeassistant").setLevel(logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        hub = XComfortHub(hass, "bench", "127.0.0.1", "bench")
+        hub.bridge._handle_SET_ALL_DATA(TOPOLOGY)
+        await hub.load_devices()
+
+        light = HASSXComfortLight(hass, hub, hub.bridge._devices[1])
+        climate = HASSXComfortRcTouch(hass, hub, hub.bridge._rooms[2])
+        power = XComfortPowerSensor(hub, hub.bridge._rooms[2])
+        energy = XComfortEnergySensor(hub, hub.bridge._rooms[2])
+        light._state_change(hub.bridge._devices[1].state.value)
+        climate._state_change(hub.bridge._rooms[2].state.value)
+
+        print(f"{WRITES} state writes per entity")
+        for name, entity, entity_id in (
+            ("light", light, "light.bench"),
+            ("climate", climate, "climate.bench"),
+            ("power sensor", power, "sensor.bench"),
+            ("energy sensor", energy, "sensor.bench_energy"),
+        ):
+            print(f"{name:>14}: {run(hass, entity, entity_id) * 1e6:8.2f} us/write")
+
+        await hub.bridge.close()
+        await hass.async_stop(force=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())